@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Milvus 连接单例
+
+fix_* 脚本共用: 同进程内多个管理器/脚本串联时只建一条连接,
+不重复付 gRPC 握手, 也不会在脚本互相 import 时泄漏连接。
+"""
+
+import threading
+from typing import Optional
+
+try:
+    from pymilvus import MilvusClient, connections
+    HAS_MILVUS = True
+except ImportError:
+    HAS_MILVUS = False
+
+_lock = threading.Lock()
+_client: Optional['MilvusClient'] = None
+_connected = False
+
+
+def ensure_connection(host: str = 'localhost', port: str = '19530',
+                      alias: str = 'default'):
+    """幂等建立 ORM 路径 (Collection/utility) 的连接"""
+    global _connected
+    if not HAS_MILVUS:
+        return
+    with _lock:
+        if not _connected:
+            connections.connect(alias=alias, host=host, port=port)
+            _connected = True
+
+
+def get_client(uri: str = 'http://localhost:19530') -> 'MilvusClient':
+    """懒初始化的 MilvusClient 单例 (首个 uri 生效)"""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = MilvusClient(uri=uri)
+        return _client
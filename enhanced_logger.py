@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版日志与安全执行工具
+
+为 QA 服务 / 爬虫脚本提供统一的错误记录、超时执行与重试封装。
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+import traceback
+import functools
+import concurrent.futures
+from queue import Queue
+from logging.handlers import QueueHandler, QueueListener
+from enum import Enum
+from types import MappingProxyType
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+# 无上下文的记录共享同一只读空映射, 不逐条分配空 dict
+_EMPTY_CONTEXT: Dict[str, Any] = MappingProxyType({})
+
+
+class ErrorLevel(Enum):
+    DEBUG = 'DEBUG'
+    INFO = 'INFO'
+    WARNING = 'WARNING'
+    ERROR = 'ERROR'
+    CRITICAL = 'CRITICAL'
+
+
+@dataclass
+class ErrorRecord:
+    """单条错误/事件记录"""
+    timestamp: str
+    level: str
+    message: str
+    context: Dict[str, Any] = field(default_factory=dict)
+    traceback_text: str = ''
+
+
+class EnhancedLogger:
+    """带内存记录与上下文的日志器"""
+
+    # 内存记录上限: 长跑的爬虫/服务不会因错误累积而无限涨内存
+    MAX_RECORDS = 10_000
+
+    def __init__(self, name: str = 'enhanced'):
+        self.logger = logging.getLogger(name)
+        # 调用方只把记录塞进无界队列 (微秒级), 真正的格式化与
+        # I/O 由后台 listener 线程做, 热路径不再等终端/磁盘
+        self._queue_handler = QueueHandler(Queue(-1))
+        self._start_listener()
+        self.logger.addHandler(self._queue_handler)
+        self.logger.propagate = False  # 不再经 root 的同步 handler 重复输出
+        self.error_records: deque = deque(maxlen=self.MAX_RECORDS)
+        # 级别计数随写随加, 汇总不再全量扫描 (deque 淘汰也不影响总数)
+        self._counts_by_level: Counter = Counter()
+        self._total_records = 0
+        self._lock = threading.Lock()
+
+    def _start_listener(self):
+        """新建队列并启动后台 listener (__init__ 与 restart 共用)"""
+        self._log_queue: Queue = Queue(-1)
+        self._queue_handler.queue = self._log_queue
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(
+            '%(asctime)s [%(levelname)s] %(message)s'))
+        self._listener = QueueListener(
+            self._log_queue, stream_handler, respect_handler_level=True)
+        self._listener.start()
+
+    def restart(self):
+        """fork 后在子进程里重建 listener 线程
+
+        master 启动的线程不会被 fork 继承: 不重建的话子进程的
+        记录只进队列、永远不会被消费。旧队列/锁在 fork 瞬间
+        可能正被持有, 一并换新。
+        """
+        self._listener = None
+        self._lock = threading.Lock()
+        self._start_listener()
+
+    def is_enabled(self, level: ErrorLevel) -> bool:
+        """热路径上的廉价级别判断, 调用方可在构造 context 前短路"""
+        return self.logger.isEnabledFor(
+            getattr(logging, level.value, logging.INFO))
+
+    def log_error(self, level: ErrorLevel, message: str,
+                  context: Optional[Dict[str, Any]] = None,
+                  exception: Optional[BaseException] = None):
+        """记录一条事件, 附带上下文; 传入异常时才格式化调用栈"""
+        if not self.is_enabled(level):
+            return
+        # format_exc() 依赖"正在处理中"的异常且无异常时也要走一遍
+        # sys.exc_info; 只对显式传入的 exception 精确格式化
+        traceback_text = ''
+        if exception is not None:
+            traceback_text = ''.join(traceback.format_exception(
+                type(exception), exception, exception.__traceback__))
+        record = ErrorRecord(
+            timestamp=datetime.now().isoformat(),
+            level=level.value,
+            message=message,
+            context=dict(context) if context else _EMPTY_CONTEXT,
+            traceback_text=traceback_text,
+        )
+        with self._lock:
+            self.error_records.append(record)
+            self._counts_by_level[record.level] += 1
+            self._total_records += 1
+        log_fn = getattr(self.logger, level.value.lower(), self.logger.info)
+        if context:
+            log_fn("%s | context=%s", message, context)
+        else:
+            log_fn(message)
+
+    def get_error_summary(self) -> Dict[str, Any]:
+        """按级别汇总记录数量 (O(1), 读预维护的计数器)"""
+        with self._lock:
+            return {'total': self._total_records,
+                    'by_level': dict(self._counts_by_level)}
+
+    def recent_errors(self, limit: int = 50) -> List[ErrorRecord]:
+        with self._lock:
+            if limit >= len(self.error_records):
+                return list(self.error_records)
+            return [self.error_records[i]
+                    for i in range(-limit, 0)]
+
+    def close(self):
+        """冲洗队列并停掉后台日志线程 (进程收尾时调用)"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+class TimeoutError_(Exception):
+    """execute_with_timeout 超时"""
+
+
+class SafeExecutor:
+    """带超时保护的函数执行器
+
+    统一走常驻工作线程 + future 超时: 任意线程可用 (SIGALRM 只在
+    主线程有效且会与其他信号使用者打架), Windows 下同样工作,
+    且免去每次调用新建/销毁线程的开销。
+    """
+
+    _pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def _executor(cls) -> concurrent.futures.ThreadPoolExecutor:
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    # 超时的任务仍会占着线程跑完, 留几个余量线程
+                    cls._pool = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=4, thread_name_prefix='safe-exec')
+        return cls._pool
+
+    @classmethod
+    def execute_with_timeout(cls, func: Callable, timeout: float = 10,
+                             *args, **kwargs) -> Any:
+        """在限定时间内执行 func, 超时抛 TimeoutError_"""
+        future = cls._executor().submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError_('执行超时 (%ss)' % timeout) from None
+
+
+def _backoff_schedule(max_retries: int, base_delay: float) -> List[float]:
+    """装饰时一次算好各次重试的基准退避秒数 (指数部分)
+
+    ±20% 抖动留到每次 sleep 前现抽: 抖动是用来打散同时失败的
+    多个调用方的 (惊群), 装饰时抽死的话所有并发调用都按同一
+    节拍退避, 等于没抖。
+    """
+    if max_retries < 1:
+        raise ValueError('max_retries 必须 >= 1, 得到 %r' % max_retries)
+    return [base_delay * (2 ** i) for i in range(max_retries)]
+
+
+def retry_on_failure(max_retries: int = 3, base_delay: float = 1.0,
+                     exceptions=(Exception,)):
+    """失败重试装饰器, 指数退避 + 抖动
+
+    exceptions 限定触发重试的异常类型, 其余异常直接穿透;
+    退避基数在装饰时算好, 重试路径上只剩查表、抽一次抖动和 sleep。
+    """
+    def decorator(func):
+        delays = _backoff_schedule(max_retries, base_delay)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            last = len(delays) - 1
+            for attempt, delay in enumerate(delays):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as exc:
+                    # 最后一次失败直接抛, 不再白睡一个退避周期
+                    if attempt == last:
+                        raise
+                    delay *= random.uniform(0.8, 1.2)
+                    logger.warning("第 %d 次尝试失败: %s, %.1fs 后重试",
+                                   attempt + 1, exc, delay)
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+def async_retry_on_failure(max_retries: int = 3, base_delay: float = 1.0,
+                           exceptions=(Exception,)):
+    """retry_on_failure 的协程版, 退避用 asyncio.sleep 不占线程"""
+    def decorator(func):
+        delays = _backoff_schedule(max_retries, base_delay)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            last = len(delays) - 1
+            for attempt, delay in enumerate(delays):
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as exc:
+                    # 最后一次失败直接抛, 不再白睡一个退避周期
+                    if attempt == last:
+                        raise
+                    delay *= random.uniform(0.8, 1.2)
+                    logger.warning("第 %d 次尝试失败: %s, %.1fs 后重试",
+                                   attempt + 1, exc, delay)
+                    await asyncio.sleep(delay)
+        return wrapper
+    return decorator
+
+
+# 模块级单例, 各服务共用
+enhanced_logger = EnhancedLogger()
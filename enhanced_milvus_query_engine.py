@@ -0,0 +1,817 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版 Milvus 查询引擎
+
+查询意图分析 + 语义检索 + 业务相关度重排序。
+在 basic_search 的粗排结果 (rerank_k) 上叠加关键词/业务/时效评分,
+输出精排后的 top_k。
+"""
+
+import time
+import re
+import logging
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from threading import RLock
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from cachetools import TTLCache
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    from pymilvus import connections, Collection, utility
+    HAS_MILVUS = True
+except ImportError:
+    HAS_MILVUS = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+# 英数词 + 单个 CJK 字符; .lower().split() 对日文混排文本会产出
+# 一个巨大 token, 既慢又让覆盖率评分失真
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_]+|[\u3040-\u30ff\u4e00-\u9fff]')
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+if HAS_NUMBA:
+    @njit(cache=True, parallel=True)
+    def _score_batch_kernel(content_ids, offsets, query_ids, domain_ids):
+        """关键词评分内核: 查询词覆盖率 + 领域词命中
+
+        候选轴上 prange 并行, 纯 int32 比较, 无解释器参与。
+        """
+        n = offsets.shape[0] - 1
+        basic = np.zeros(n, dtype=np.float32)
+        business = np.zeros(n, dtype=np.float32)
+        nq = query_ids.shape[0]
+        for i in prange(n):
+            start = offsets[i]
+            end = offsets[i + 1]
+            matched = 0
+            for q in range(nq):
+                qid = query_ids[q]
+                for j in range(start, end):
+                    if content_ids[j] == qid:
+                        matched += 1
+                        break
+            if nq > 0:
+                basic[i] = matched / nq
+            hits = 0
+            for j in range(start, end):
+                tid = content_ids[j]
+                for d in range(domain_ids.shape[0]):
+                    if tid == domain_ids[d]:
+                        hits += 1
+                        break
+            score = hits * 0.1
+            if score > 0.5:
+                score = 0.5
+            business[i] = score
+        return basic, business
+
+
+@dataclass(slots=True)
+class QueryContext:
+    """查询意图分析结果"""
+    intent_type: str = 'general'
+    domain: str = 'general'
+    temporal_preference: str = 'any'
+    importance_keywords: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class SearchResult:
+    """精排后的单条结果"""
+    id: int
+    content: str
+    title: str
+    url: str
+    content_type: str
+    timestamp: float
+    semantic_score: float
+    keyword_score: float
+    business_score: float
+    temporal_score: float
+    combined_score: float
+
+
+class EnhancedMilvusQueryEngine:
+    """带意图分析与业务重排序的查询引擎"""
+
+    # 实体抽取正则在类加载时编译一次
+    MONEY_RE = re.compile(r'(\d+(?:,\d{3})*(?:\.\d+)?)\s*([億万千百十]?)円',
+                          re.UNICODE)
+    PCT_RE = re.compile(r'(\d+(?:\.\d+)?)\s*[%％]', re.UNICODE)
+    YEAR_RE = re.compile(r'(20\d{2}|19\d{2})\s*年', re.UNICODE)
+
+    def __init__(self, host: str = 'localhost', port: str = '19530'):
+        self.host = host
+        self.port = port
+        self.collection_name = None
+        self.collection = None
+        # connect_and_scan 填充的 集合->元数据 缓存
+        self._collection_meta: Dict[str, Dict[str, Any]] = {}
+
+        # 五类业务关键词
+        self.business_keywords = {
+            'company': ['会社', '企業', '法人', 'corporation', 'company'],
+            'financial': ['売上', '利益', '収益', '決算', '財務', 'revenue'],
+            'product': ['製品', 'サービス', '商品', 'product', 'service'],
+            'technical': ['技術', 'システム', '開発', 'API', 'technology'],
+            'temporal': ['最新', '今年', '昨年', '過去', 'latest', 'recent'],
+        }
+        self.content_type_weights = {
+            'article': 1.2,
+            'news': 1.1,
+            'documentation': 1.0,
+            'blog': 0.9,
+            'other': 0.8,
+        }
+        # 业务相关度指标词
+        self.financial_indicators = ['売上', '利益', '億円', '万円', '決算',
+                                     '株価', '配当']
+        self.company_indicators = ['株式会社', '有限会社', '代表取締役',
+                                   '本社', '設立']
+        self.business_indicators = ['事業', '戦略', '市場', '顧客', '競合',
+                                    'シェア']
+
+        # 查询结果缓存: 重复查询跳过 embed + ANN + 重排全流程
+        self._result_cache = TTLCache(maxsize=2000, ttl=300)
+        self._cache_lock = RLock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # 关键词自动机: 一次线性扫描得到全部命中及其类别,
+        # 取代逐类别逐关键词的 `in` 子串扫
+        self._ac = self._build_keyword_automaton()
+
+        # 指标词也编入自动机: 三类指标对 content 一趟扫完
+        self._indicator_ac = self._build_indicator_automaton()
+
+        # 扁平 关键词->类别 映射 + 全词表交替正则:
+        # 英文词走 tokenize 后的 dict 查找, CJK 连写形式由正则补扫
+        self._kw_to_category: Dict[str, str] = {
+            keyword: category
+            for category, keywords in self.business_keywords.items()
+            for keyword in keywords}
+        self._domain_regex = re.compile('|'.join(
+            map(re.escape, sorted(self._kw_to_category,
+                                  key=len, reverse=True))))
+
+        # token -> int id 词表, 供 numba 评分内核用
+        self._token_ids: Dict[str, int] = {}
+
+        # 按 result id 缓存派生特征 (小写文本/词集/指标分),
+        # 跨查询复用, 同一候选的字符串工作只做一次
+        self._feature_cache: OrderedDict = OrderedDict()
+        self._feature_cache_max = 10000
+        # _rerank 在线程池里并发取特征, OrderedDict 的
+        # 读改写序列 (get/move_to_end/insert/popitem) 必须持锁
+        self._feature_lock = RLock()
+
+        # 粗排候选缓存: 同一查询在 top_k 扫描中只打一次 ANN
+        self._candidate_cache: OrderedDict = OrderedDict()
+        self._candidate_cache_max = 256
+
+        # 查询向量缓存: top_k 扫描/交互重试重复 embed 同一查询时直接复用
+        self._embed_cache: OrderedDict = OrderedDict()
+        self._embed_cache_max = 1024
+
+        # 候选评分线程池: 特征计算以正则/指标扫描为主, 多在 C 层释放 GIL
+        self._pool = ThreadPoolExecutor(max_workers=4,
+                                        thread_name_prefix='rescore')
+
+        if HAS_SENTENCE_TRANSFORMERS:
+            self.embedder = SentenceTransformer(
+                'paraphrase-multilingual-MiniLM-L12-v2')
+        else:
+            self.embedder = None
+            logger.warning("sentence-transformers 不可用")
+
+    def _build_keyword_automaton(self):
+        """把 business_keywords 全量编入 Aho-Corasick 自动机"""
+        if not HAS_AHOCORASICK:
+            return None
+        automaton = ahocorasick.Automaton()
+        for category, keywords in self.business_keywords.items():
+            for keyword in keywords:
+                automaton.add_word(keyword, (keyword, category))
+        automaton.make_automaton()
+        return automaton
+
+    def _build_indicator_automaton(self):
+        if not HAS_AHOCORASICK:
+            return None
+        automaton = ahocorasick.Automaton()
+        for domain, indicators in (
+                ('financial', self.financial_indicators),
+                ('company', self.company_indicators),
+                ('business', self.business_indicators)):
+            for indicator in indicators:
+                automaton.add_word(indicator, (indicator, domain))
+        automaton.make_automaton()
+        return automaton
+
+    def _indicator_score_raw(self, content: str) -> float:
+        """三类指标词的命中分, 一次线性扫描"""
+        if self._indicator_ac is not None:
+            matched = {hit for _, hit in self._indicator_ac.iter(content)}
+            return 0.1 * len(matched)
+        return (
+            sum(0.1 for ind in self.financial_indicators if ind in content)
+            + sum(0.1 for ind in self.company_indicators if ind in content)
+            + sum(0.1 for ind in self.business_indicators
+                  if ind in content))
+
+    def _iter_keyword_hits(self, text: str):
+        """yield (keyword, category), 自动机一趟扫描; 无自动机时回退逐词"""
+        if self._ac is not None:
+            for _, hit in self._ac.iter(text):
+                yield hit
+        else:
+            for category, keywords in self.business_keywords.items():
+                for keyword in keywords:
+                    if keyword in text:
+                        yield keyword, category
+
+    # ------------------------------------------------------------------
+    # 连接与集合选择
+    # ------------------------------------------------------------------
+
+    def connect_and_scan(self) -> List[str]:
+        """连接 Milvus, 列出集合并缓存各集合的记录数"""
+        if not HAS_MILVUS:
+            logger.warning("pymilvus 不可用")
+            return []
+        connections.connect(alias='default', host=self.host, port=self.port)
+        names = utility.list_collections()
+        # 元数据一次取全, 之后的集合选择不再每次构造 Collection 发 RPC
+        self._collection_meta = {
+            name: {'num_entities': Collection(name).num_entities}
+            for name in names}
+        logger.info("发现 %d 个集合: %s", len(names), names)
+        return names
+
+    def auto_select_best_collection(self) -> Optional[str]:
+        """按记录数与名称相关性自动选择集合 (读缓存元数据)"""
+        if not HAS_MILVUS:
+            return None
+        if not self._collection_meta:
+            self.connect_and_scan()
+        best_name = None
+        best_score = -1.0
+        for name, meta in self._collection_meta.items():
+            score = float(meta['num_entities'])
+            if 'business' in name or 'company' in name:
+                score *= 1.2
+            if score > best_score:
+                best_score = score
+                best_name = name
+        if best_name:
+            self.collection_name = best_name
+            self.collection = Collection(best_name)
+            self.collection.load()
+            logger.info("选择集合: %s", best_name)
+        return best_name
+
+    def _collection_analysis(self) -> Dict[str, Any]:
+        """统计集合的内容类型分布与熵"""
+        if self.collection is None:
+            return {}
+        rows = self.collection.query(
+            expr='id >= 0', output_fields=['content_type'], limit=10000)
+        distribution: Dict[str, int] = {}
+        for row in rows:
+            ct = row.get('content_type', 'other')
+            distribution[ct] = distribution.get(ct, 0) + 1
+        total_records = sum(distribution.values()) or 1
+        p = np.fromiter(distribution.values(),
+                        dtype=np.float64) / total_records
+        entropy = float(-(p * np.log2(p, where=p > 0,
+                                      out=np.zeros_like(p))).sum())
+        return {'total': total_records, 'distribution': distribution,
+                'entropy': entropy}
+
+    # ------------------------------------------------------------------
+    # 意图分析与评分
+    # ------------------------------------------------------------------
+
+    def analyze_query_intent(self, query: str) -> QueryContext:
+        """分析查询意图: 领域、时效偏好与重要关键词"""
+        hits_by_category: Counter = Counter()
+        importance_keywords: List[str] = []
+        kw_to_category = self._kw_to_category
+        seen = set()
+        for token in _TOKEN_RE.findall(query.casefold()):
+            category = kw_to_category.get(token)
+            if category and token not in seen:
+                seen.add(token)
+                hits_by_category[category] += 1
+                importance_keywords.append(token)
+        for keyword in self._domain_regex.findall(query):
+            if keyword not in seen:
+                seen.add(keyword)
+                hits_by_category[kw_to_category[keyword]] += 1
+                importance_keywords.append(keyword)
+
+        domain = 'general'
+        if hits_by_category:
+            domain = hits_by_category.most_common(1)[0][0]
+
+        temporal_preference = 'any'
+        if hits_by_category.get('temporal'):
+            if any(k in query for k in ('最新', '今年', 'latest', 'recent')):
+                temporal_preference = 'recent'
+            elif any(k in query for k in ('過去', '昨年')):
+                temporal_preference = 'historical'
+
+        intent_type = 'business' if domain in ('company', 'financial') \
+            else 'general'
+        return QueryContext(intent_type=intent_type, domain=domain,
+                            temporal_preference=temporal_preference,
+                            importance_keywords=importance_keywords)
+
+    def extract_business_entities(self, content: str) -> List[str]:
+        """抽取金额/百分比/年份实体"""
+        entities = ['%s%s円' % pair for pair in self.MONEY_RE.findall(content)]
+        entities += ['%s%%' % pct for pct in self.PCT_RE.findall(content)]
+        entities += ['%s年' % year for year in self.YEAR_RE.findall(content)]
+        return entities
+
+    def _encode_tokens(self, text: str) -> np.ndarray:
+        """文本 -> int32 token id 数组 (词表增量扩展)"""
+        ids = self._token_ids
+        out = []
+        for token in _TOKEN_RE.findall(text.casefold()):
+            tid = ids.get(token)
+            if tid is None:
+                tid = len(ids)
+                ids[token] = tid
+            out.append(tid)
+        return np.array(out, dtype=np.int32)
+
+    def _keyword_scores_jit(self, query: str, contents: List[str],
+                            context: QueryContext) -> np.ndarray:
+        """numba 内核批量计算关键词分; 短语加成留在 Python 层"""
+        query_lower = query.lower()
+        query_ids = self._encode_tokens(query)
+        encoded = [self._encode_tokens(c) for c in contents]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        content_ids = np.concatenate(encoded) if encoded \
+            else np.empty(0, dtype=np.int32)
+        domain_ids = self._encode_tokens(
+            ' '.join(self.business_keywords.get(context.domain, [])))
+        basic, business = _score_batch_kernel(
+            content_ids, offsets, query_ids, domain_ids)
+        phrase = np.fromiter(
+            (0.3 if query_lower in c.lower() else 0.0 for c in contents),
+            dtype=np.float32, count=len(contents))
+        return np.minimum(basic + business + phrase, 1.0)
+
+    def calculate_keyword_score(self, query: str, content: str,
+                                context: QueryContext) -> float:
+        """查询词覆盖 + 业务关键词命中评分"""
+        content_lower = content.casefold()
+        content_words = set(_TOKEN_RE.findall(content_lower))
+        query_words = set(_TOKEN_RE.findall(query.casefold()))
+        basic_score = 0.0
+        if query_words:
+            basic_score = len(query_words & content_words) / len(query_words)
+
+        business_score = 0.0
+        for keyword, category in self._iter_keyword_hits(content_lower):
+            if category == context.domain:
+                business_score += 0.1
+        business_score = min(business_score, 0.5)
+
+        phrase_score = 0.3 if query.lower() in content_lower else 0.0
+        return min(basic_score + business_score + phrase_score, 1.0)
+
+    def _result_features(self, result_id, content: str):
+        """取或算单条候选的 (小写文本, 词集, 原始指标分)
+
+        可能被评分线程池并发调用; 缓存操作持锁, 正则/指标
+        计算本身放在锁外, 锁只覆盖微秒级的字典操作。
+        """
+        cache = self._feature_cache
+        with self._feature_lock:
+            features = cache.get(result_id)
+            if features is not None:
+                cache.move_to_end(result_id)
+                return features
+        content_lower = content.casefold()
+        token_set = frozenset(_TOKEN_RE.findall(content_lower))
+        features = (content_lower, token_set,
+                    self._indicator_score_raw(content))
+        with self._feature_lock:
+            cache[result_id] = features
+            if len(cache) > self._feature_cache_max:
+                cache.popitem(last=False)
+        return features
+
+    def _keyword_score_from_features(self, query_words: frozenset,
+                                     query_lower: str, features,
+                                     context: QueryContext) -> float:
+        """calculate_keyword_score 的缓存特征版"""
+        content_lower, token_set, _ = features
+        basic_score = 0.0
+        if query_words:
+            basic_score = len(query_words & token_set) / len(query_words)
+        business_score = 0.0
+        for keyword, category in self._iter_keyword_hits(content_lower):
+            if category == context.domain:
+                business_score += 0.1
+        business_score = min(business_score, 0.5)
+        phrase_score = 0.3 if query_lower in content_lower else 0.0
+        return min(basic_score + business_score + phrase_score, 1.0)
+
+    def calculate_business_relevance_score(self, content: str,
+                                           context: QueryContext) -> float:
+        """金融/公司/业务指标词命中评分"""
+        score = self._indicator_score_raw(content)
+        if context.domain in ('financial', 'company'):
+            score *= 1.5
+        return min(score, 1.0)
+
+    @staticmethod
+    def _vec_temporal(timestamps: np.ndarray,
+                      context: QueryContext) -> np.ndarray:
+        """全候选时效分: np.select 无分支批量计算"""
+        n = timestamps.shape[0]
+        if context.temporal_preference == 'any':
+            return np.ones(n, dtype=np.float32)
+        age_days = (time.time() - timestamps) / 86400
+        if context.temporal_preference == 'recent':
+            scores = np.select(
+                [age_days <= 30, age_days <= 90, age_days <= 365],
+                [1.0, 0.8, 0.6], default=0.4)
+        else:  # historical
+            scores = np.select(
+                [age_days > 365, age_days > 90],
+                [1.0, 0.8], default=0.6)
+        return scores.astype(np.float32)
+
+    def calculate_temporal_score(self, timestamp: float,
+                                 context: QueryContext) -> float:
+        """按内容年龄与时效偏好评分"""
+        if context.temporal_preference == 'any':
+            return 1.0
+        age_days = (time.time() - timestamp) / 86400
+        if context.temporal_preference == 'recent':
+            if age_days <= 30:
+                return 1.0
+            elif age_days <= 90:
+                return 0.8
+            elif age_days <= 365:
+                return 0.6
+            else:
+                return 0.4
+        else:  # historical
+            if age_days > 365:
+                return 1.0
+            elif age_days > 90:
+                return 0.8
+            else:
+                return 0.6
+
+    # ------------------------------------------------------------------
+    # 检索
+    # ------------------------------------------------------------------
+
+    def _embed_cache_put(self, query: str, embedding):
+        """写入向量缓存并执行容量淘汰 (所有写入都走这里)"""
+        cache = self._embed_cache
+        cache[query] = embedding
+        cache.move_to_end(query)
+        if len(cache) > self._embed_cache_max:
+            cache.popitem(last=False)
+
+    def _embed_cached(self, query: str):
+        """带 LRU 的查询向量化"""
+        cache = self._embed_cache
+        embedding = cache.get(query)
+        if embedding is not None:
+            cache.move_to_end(query)
+            return embedding
+        embedding = self.embedder.encode([query])
+        self._embed_cache_put(query, embedding)
+        return embedding
+
+    def basic_search(self, query: str, top_k: int = 10) -> List[Dict]:
+        """语义粗排"""
+        if self.collection is None or self.embedder is None:
+            return []
+        embedding = self._embed_cached(query)
+        raw = self.collection.search(
+            data=embedding, anns_field='embedding',
+            param=self._search_params(),
+            limit=top_k,
+            output_fields=['content', 'title', 'url', 'content_type',
+                           'timestamp', 'word_count'])
+        return self._parse_hits(raw[0])
+
+    def create_quantized_index(self, nlist: int = 100):
+        """为当前集合建 IVF_SQ8 标量量化索引
+
+        向量按 int8 存储, 距离计算的内存流量约为 FP32 的 1/4,
+        适合内存带宽受限的大集合部署; 默认摄取侧的 HNSW 不变,
+        需要时显式调用本方法切换。
+        """
+        if self.collection is None:
+            return
+        self.collection.release()
+        self.collection.drop_index()
+        self.collection.create_index(
+            field_name='embedding',
+            index_params={'index_type': 'IVF_SQ8',
+                          'metric_type': 'COSINE',
+                          'params': {'nlist': nlist}})
+        self.collection.load()
+        logger.info("IVF_SQ8 索引已建立 (nlist=%d)", nlist)
+
+    def _search_params(self) -> Dict[str, Any]:
+        """按实际索引类型给搜索参数 (IVF 用 nprobe, HNSW 用 ef)"""
+        index_type = ''
+        try:
+            if self.collection is not None and self.collection.indexes:
+                index_type = self.collection.indexes[0].params.get(
+                    'index_type', '')
+        except Exception:  # noqa: BLE001
+            pass
+        if index_type.startswith('IVF'):
+            return {'metric_type': 'COSINE', 'params': {'nprobe': 10}}
+        return {'metric_type': 'COSINE', 'params': {'ef': 64}}
+
+    # 粗排只取评分需要的字段; title/url 等展示字段在 top_k 定下后再补
+    RERANK_FIELDS = ['content', 'content_type', 'timestamp']
+
+    def _search_candidates(self, query: str, rerank_k: int) -> List[Dict]:
+        """重排用的瘦身粗排: 不为会被丢弃的候选拉展示字段
+
+        候选列表按 (集合, 查询, rerank_k) 缓存, basic/enhanced 对比
+        与多 top_k 扫描共用一次 ANN 往返。
+        """
+        if self.collection is None or self.embedder is None:
+            return []
+        cache_key = (self.collection_name, query, rerank_k)
+        cache = self._candidate_cache
+        cached = cache.get(cache_key)
+        if cached is not None:
+            cache.move_to_end(cache_key)
+            return cached
+        raw = self.collection.search(
+            data=self._embed_cached(query), anns_field='embedding',
+            param=self._search_params(),
+            limit=rerank_k, output_fields=self.RERANK_FIELDS)
+        results = self._parse_hits(raw[0])
+        cache[cache_key] = results
+        if len(cache) > self._candidate_cache_max:
+            cache.popitem(last=False)
+        return results
+
+    def _hydrate_display_fields(self, results: List[Dict]):
+        """为最终 top_k 批量补取 title/url"""
+        missing = [r['id'] for r in results if not r['title']]
+        if not missing or self.collection is None:
+            return
+        rows = self.collection.query(
+            expr='id in %s' % missing,
+            output_fields=['id', 'title', 'url'])
+        by_id = {row['id']: row for row in rows}
+        for result in results:
+            row = by_id.get(result['id'])
+            if row:
+                result['title'] = row.get('title') or ''
+                result['url'] = row.get('url') or ''
+
+    @staticmethod
+    def _parse_hits(hits) -> List[Dict]:
+        return [{
+            'id': hit.id,
+            'score': float(hit.score),
+            'content': hit.entity.get('content') or '',
+            'title': hit.entity.get('title') or '',
+            'url': hit.entity.get('url') or '',
+            'content_type': hit.entity.get('content_type') or 'other',
+            'timestamp': hit.entity.get('timestamp') or 0.0,
+        } for hit in hits]
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """结果缓存命中统计"""
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'hit_rate': self._cache_hits / total if total else 0.0,
+                'size': len(self._result_cache),
+            }
+
+    def invalidate_cache(self):
+        """数据变更 (upsert/delete) 后调用"""
+        with self._cache_lock:
+            self._result_cache.clear()
+            self._candidate_cache.clear()
+
+    def enhanced_search(self, query: str, top_k: int = 10,
+                        rerank_k: int = 20) -> List[SearchResult]:
+        """粗排 rerank_k 后按关键词/业务/时效重排, 返回 top_k
+
+        结果按 (collection, query, top_k, rerank_k) 做 TTL+LRU 缓存,
+        命中时 ANN 检索与重排评分全部跳过。
+        """
+        cache_key = (self.collection_name, query, top_k, rerank_k)
+        with self._cache_lock:
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                self._cache_hits += 1
+                return cached
+            self._cache_misses += 1
+
+        query_context = self.analyze_query_intent(query)
+        initial_results = self._search_candidates(query, rerank_k)
+        top_results = self._rerank(query, query_context, initial_results,
+                                   top_k)
+        with self._cache_lock:
+            self._result_cache[cache_key] = top_results
+        return top_results
+
+    def enhanced_batch_search(self, queries: List[str], top_k: int = 10,
+                              rerank_k: int = 20) -> List[List[SearchResult]]:
+        """多查询批量检索
+
+        未命中缓存的查询合并为一次 encode + 一次多向量 Milvus search,
+        RTT 与模型前向的固定开销摊到整批; 命中的直接取缓存结果。
+        """
+        answers: List[Optional[List[SearchResult]]] = [None] * len(queries)
+        miss_indices = []
+        with self._cache_lock:
+            for i, query in enumerate(queries):
+                cached = self._result_cache.get(
+                    (self.collection_name, query, top_k, rerank_k))
+                if cached is not None:
+                    self._cache_hits += 1
+                    answers[i] = cached
+                else:
+                    self._cache_misses += 1
+                    miss_indices.append(i)
+
+        if miss_indices and self.collection is not None \
+                and self.embedder is not None:
+            miss_queries = [queries[i] for i in miss_indices]
+            embeddings = self.embedder.encode(miss_queries)
+            for query, embedding in zip(miss_queries, embeddings):
+                self._embed_cache_put(query, np.asarray([embedding]))
+            raw = self.collection.search(
+                data=embeddings, anns_field='embedding',
+                param=self._search_params(),
+                limit=rerank_k, output_fields=self.RERANK_FIELDS)
+            for i, hits in zip(miss_indices, raw):
+                query = queries[i]
+                query_context = self.analyze_query_intent(query)
+                top_results = self._rerank(query, query_context,
+                                           self._parse_hits(hits), top_k)
+                answers[i] = top_results
+                with self._cache_lock:
+                    self._result_cache[
+                        (self.collection_name, query, top_k, rerank_k)] = \
+                        top_results
+        return [a if a is not None else [] for a in answers]
+
+    def _rerank(self, query: str, query_context: QueryContext,
+                initial_results: List[Dict],
+                top_k: int) -> List[SearchResult]:
+        """对粗排候选做关键词/业务/时效重排"""
+        if not initial_results:
+            return []
+
+        # 各分量收进数组, 组合分数用一条向量表达式算完,
+        # 逐行 Python 标量运算只剩下仍是字符串工作的关键词/业务评分
+        n = len(initial_results)
+        semantic = np.fromiter((r['score'] for r in initial_results),
+                               dtype=np.float32, count=n)
+        if n >= 8:
+            features = list(self._pool.map(
+                lambda r: self._result_features(r['id'], r['content']),
+                initial_results))
+        else:
+            # 小批量时线程分发开销不划算, 走串行
+            features = [self._result_features(r['id'], r['content'])
+                        for r in initial_results]
+        if HAS_NUMBA:
+            kw = self._keyword_scores_jit(
+                query, [r['content'] for r in initial_results],
+                query_context)
+        else:
+            query_lower = query.casefold()
+            query_words = frozenset(_TOKEN_RE.findall(query_lower))
+            kw = np.fromiter(
+                (self._keyword_score_from_features(query_words, query_lower,
+                                                   f, query_context)
+                 for f in features), dtype=np.float32, count=n)
+        domain_boost = 1.5 if query_context.domain in ('financial',
+                                                       'company') else 1.0
+        biz = np.fromiter(
+            (min(f[2] * domain_boost, 1.0) for f in features),
+            dtype=np.float32, count=n)
+        # 循环外取一次时钟与方法引用, 循环体内只剩 LOAD_FAST
+        now = time.time()
+        ctw_get = self.content_type_weights.get
+        ct_weights = np.fromiter(
+            (ctw_get(r['content_type'], 1.0) for r in initial_results),
+            dtype=np.float32, count=n)
+        timestamps = np.fromiter(
+            (r.get('timestamp', now) for r in initial_results),
+            dtype=np.float64, count=n)
+        temporal = self._vec_temporal(timestamps, query_context)
+
+        combined = (semantic * 0.4 + kw * 0.3 + biz * 0.2
+                    + (ct_weights - 1.0) * 0.1) * temporal
+
+        # 部分选择代替全量排序: O(n log k), 且只物化 top_k 个 SearchResult
+        if top_k < n:
+            top_idx = np.argpartition(-combined, top_k)[:top_k]
+            top_idx = top_idx[np.argsort(-combined[top_idx])]
+        else:
+            top_idx = np.argsort(-combined)
+
+        selected = [initial_results[i] for i in top_idx]
+        self._hydrate_display_fields(selected)
+
+        top_results = [SearchResult(
+            id=result['id'],
+            content=result['content'],
+            title=result['title'],
+            url=result['url'],
+            content_type=result['content_type'],
+            timestamp=float(timestamps[i]),
+            semantic_score=float(semantic[i]),
+            keyword_score=float(kw[i]),
+            business_score=float(biz[i]),
+            temporal_score=float(temporal[i]),
+            combined_score=float(combined[i]),
+        ) for i, result in zip(top_idx, selected)]
+        return top_results
+
+    # ------------------------------------------------------------------
+    # 性能分析
+    # ------------------------------------------------------------------
+
+    def _query_performance_analysis(self, query: str) -> Dict[str, Any]:
+        """对比 basic 与不同 top_k 下 enhanced 的耗时"""
+        report: Dict[str, Any] = {'query': query}
+
+        # 候选缓存预热后, 下面的对比只计评分开销, 不重复计 ANN 往返
+        start = time.time()
+        basic = self._search_candidates(query, rerank_k=20)
+        report['basic'] = {'elapsed': time.time() - start,
+                           'count': len(basic)}
+
+        for top_k in (5, 10, 20):
+            start = time.time()
+            enhanced = self.enhanced_search(query, top_k=top_k)
+            report['enhanced_top%d' % top_k] = {
+                'elapsed': time.time() - start,
+                'count': len(enhanced),
+            }
+        return report
+
+
+def main():
+    engine = EnhancedMilvusQueryEngine()
+    engine.connect_and_scan()
+    engine.auto_select_best_collection()
+    while True:
+        try:
+            query = input('查询> ').strip()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if not query or query in ('q', 'quit', 'exit'):
+            break
+        for rank, result in enumerate(engine.enhanced_search(query), 1):
+            print('%2d. [%.3f] %s' % (rank, result.combined_score,
+                                      result.title))
+
+
+if __name__ == '__main__':
+    main()
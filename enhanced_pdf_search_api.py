@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版 PDF 检索 API
+
+Flask 服务: /api/search (语义检索), /api/answer (混合问答),
+/api/health, /api/stats, /api/logs。
+"""
+
+import os
+import time
+import atexit
+import asyncio
+import hashlib
+import logging
+import itertools
+import threading
+import concurrent.futures
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import orjson
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
+
+from enhanced_logger import enhanced_logger, ErrorLevel
+from enhanced_qa_service import EnhancedQASystem
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+try:
+    from pymilvus import connections, Collection
+    HAS_MILVUS = True
+except ImportError:
+    HAS_MILVUS = False
+
+logger = logging.getLogger(__name__)
+
+CONFIG = {
+    'MILVUS_HOST': os.environ.get('MILVUS_HOST', 'localhost'),
+    'MILVUS_PORT': os.environ.get('MILVUS_PORT', '19530'),
+    'COLLECTION_NAME': 'pdf_documents',
+    'PDF_FOLDER': os.environ.get('PDF_FOLDER', './pdfs'),
+    'SEARCH_TIMEOUT': 10,
+    'MAX_TOP_K': 20,
+    # fp16 查询向量: RPC 负载与向量比较的内存流量减半 (Milvus 2.4+),
+    # 需集合按 FLOAT16_VECTOR 建 (enhanced_processor 已如此); 'fp32' 为兼容回退
+    'VECTOR_DTYPE': os.environ.get('VECTOR_DTYPE', 'fp16'),
+}
+
+class ORJSONProvider(JSONProvider):
+    """orjson 序列化: C 层编码且原生支持 numpy 标量"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(
+            obj,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# 全局服务对象, 在 initialize_services 里填充
+vector_embedder = None
+milvus_manager = None
+qa_system = None
+query_batcher = None
+# 常驻检索线程池, 取代每请求新建线程/定时器的 SafeExecutor
+SEARCH_POOL = None
+
+# 计数器用 itertools.count: next() 是单条字节码, 免锁且无竞态,
+# 取代多线程下不安全的 dict[k] += 1
+_STARTED_AT = datetime.now().isoformat()
+_req_total = itertools.count()
+_req_err = itertools.count()
+_req_search = itertools.count()
+_req_answer = itertools.count()
+
+
+def _count_value(counter) -> int:
+    """读出 count 当前值而不消耗它"""
+    return counter.__reduce__()[1][0]
+
+
+def system_stats_snapshot() -> Dict[str, Any]:
+    """统计的本地快照, 供 jsonify 序列化
+
+    处理器序列化的是这里新建的局部 dict, 而不是并发可变的共享对象;
+    计数器递增是原子的 next(), 读写双方都无需加锁。
+    """
+    return {
+        'requests_count': _count_value(_req_total),
+        'error_count': _count_value(_req_err),
+        'search_count': _count_value(_req_search),
+        'answer_count': _count_value(_req_answer),
+        'started_at': _STARTED_AT,
+    }
+
+
+class OptimizedVectorEmbedder:
+    """查询向量化封装"""
+
+    def __init__(self, model_name: str = 'paraphrase-multilingual-MiniLM-L12-v2',
+                 dimension: int = 384):
+        self.dimension = dimension
+        if HAS_SENTENCE_TRANSFORMERS:
+            self.model = SentenceTransformer(model_name)
+        else:
+            self.model = None
+            logger.warning("sentence-transformers 不可用")
+
+    def embed_texts_batch(self, texts: List[str],
+                          show_progress: bool = False) -> np.ndarray:
+        """批量向量化"""
+        if self.model is None:
+            return np.zeros((len(texts), self.dimension), dtype=np.float32)
+        return self.model.encode(texts, batch_size=32,
+                                 normalize_embeddings=True,
+                                 show_progress_bar=show_progress)
+
+
+class CachedEmbedder:
+    """embed_texts_batch 的进程内 LRU 缓存
+
+    以查询文本的 SHA-256 为键; 热门查询 (健康面板、演示问题)
+    命中后跳过整个模型前向, 约 50-200ms 变成一次 dict 查找。
+    """
+
+    def __init__(self, embedder, maxsize: int = 4096):
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_texts_batch(self, texts: List[str],
+                          show_progress: bool = False) -> np.ndarray:
+        keys = [hashlib.sha256(t.encode('utf-8')).hexdigest() for t in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        miss_indices = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[i] = cached
+                else:
+                    miss_indices.append(i)
+
+        if miss_indices:
+            miss_texts = [texts[i] for i in miss_indices]
+            embeddings = self.embedder.embed_texts_batch(
+                miss_texts, show_progress=show_progress)
+            with self._lock:
+                for i, embedding in zip(miss_indices, embeddings):
+                    results[i] = embedding
+                    self._cache[keys[i]] = embedding
+                    if len(self._cache) > self.maxsize:
+                        self._cache.popitem(last=False)
+        return np.asarray(results)
+
+
+class OptimizedMilvusManager:
+    """Milvus 检索封装"""
+
+    def __init__(self, host: str, port: str, collection_name: str,
+                 vector_dtype: str = 'fp16'):
+        self.collection_name = collection_name
+        self.vector_dtype = np.float16 if vector_dtype == 'fp16' \
+            else np.float32
+        self.collection = None
+        if HAS_MILVUS:
+            connections.connect(alias='default', host=host, port=port)
+            self.collection = Collection(collection_name)
+            self.collection.load()
+
+    OUTPUT_FIELDS = ['text', 'pdf_name', 'page_number', 'chunk_type', 'metadata']
+
+    def search(self, data, top_k: int = 10) -> List[List[Dict]]:
+        """多向量批量检索, 返回与输入同序的 N 组结果"""
+        if self.collection is None:
+            return [[] for _ in range(len(data))]
+        data = np.asarray(data).astype(self.vector_dtype, copy=False)
+        raw = self.collection.search(
+            data=list(data), anns_field='embedding',
+            param={'metric_type': 'COSINE', 'params': {'ef': 64}},
+            limit=top_k, output_fields=self.OUTPUT_FIELDS)
+        result_lists = []
+        for hits in raw:
+            results = []
+            for hit in hits:
+                results.append({
+                    'id': hit.id,
+                    'score': float(hit.score),
+                    'text': hit.entity.get('text') or '',
+                    'pdf_name': hit.entity.get('pdf_name') or '',
+                    'page_number': hit.entity.get('page_number') or 0,
+                    'chunk_type': hit.entity.get('chunk_type') or 'text',
+                    'metadata': hit.entity.get('metadata') or {},
+                })
+            result_lists.append(results)
+        return result_lists
+
+    def search_similar(self, query_text: str, top_k: int = 10,
+                       embedder=None) -> List[Dict]:
+        """单条文本检索"""
+        embedder = embedder or vector_embedder
+        embedding = embedder.embed_texts_batch([query_text],
+                                               show_progress=False)
+        return self.search(embedding, top_k=top_k)[0]
+
+
+class QueryBatcher:
+    """并发查询微批器
+
+    并发到达的查询在 ~5ms 窗口内合并成一个批次: 一次 embed_texts_batch
+    前向 + 一次多向量 Milvus search, 把两头的固定开销摊到整批上。
+    """
+
+    MAX_BATCH = 32
+    WINDOW = 0.005
+
+    def __init__(self, embedder, manager):
+        self.embedder = embedder
+        self.manager = manager
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._drain_loop,
+                                        name='query-batcher', daemon=True)
+        self._worker.start()
+
+    def search(self, query_text: str, top_k: int) -> List[Dict]:
+        """提交查询并阻塞等待本批结果"""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._cond:
+            self._queue.append((query_text, top_k, future))
+            self._cond.notify()
+        return future.result(timeout=CONFIG['SEARCH_TIMEOUT'])
+
+    def _drain_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # 给同批并发请求一个聚合窗口
+                self._cond.wait(self.WINDOW)
+                batch = [self._queue.popleft()
+                         for _ in range(min(len(self._queue), self.MAX_BATCH))]
+            try:
+                texts = [text for text, _, _ in batch]
+                top_k = max(k for _, k, _ in batch)
+                embeddings = self.embedder.embed_texts_batch(
+                    texts, show_progress=False)
+                result_lists = self.manager.search(embeddings, top_k=top_k)
+            except Exception as exc:  # noqa: BLE001
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, k, future), results in zip(batch, result_lists):
+                if not future.done():
+                    future.set_result(results[:k])
+
+
+def _fmt_result(r, score, relevance, g=dict.get):
+    """单条检索结果的响应格式化 (dict.get 只解析一次)"""
+    return {
+        'id': g(r, 'id', ''),
+        'text': g(r, 'text', ''),
+        'pdf_name': g(r, 'pdf_name', ''),
+        'page_number': g(r, 'page_number', 0),
+        'chunk_type': g(r, 'chunk_type', 'text'),
+        'score': round(float(score), 4),
+        'metadata': g(r, 'metadata', {}),
+        'relevance': str(relevance),
+    }
+
+
+def preload_model():
+    """只加载模型, 不起任何线程
+
+    这一步是 fork 安全的: --preload 下在 gunicorn master 里调用,
+    权重加载一次后 fork COW 共享。线程类服务 (QueryBatcher/线程池/
+    日志 listener) 在 fork 后的子进程里是死线程, 必须留到 post_fork
+    里的 initialize_services 再起。
+    """
+    global vector_embedder
+    if vector_embedder is None:
+        vector_embedder = CachedEmbedder(
+            OptimizedVectorEmbedder(dimension=384))
+    return vector_embedder
+
+
+def initialize_services():
+    """初始化全局 embedder / Milvus / QA 系统 (每个 worker 进程一次)"""
+    global milvus_manager, qa_system, query_batcher
+    global SEARCH_POOL
+    preload_model()
+    milvus_manager = OptimizedMilvusManager(
+        CONFIG['MILVUS_HOST'], CONFIG['MILVUS_PORT'],
+        CONFIG['COLLECTION_NAME'], vector_dtype=CONFIG['VECTOR_DTYPE'])
+    SEARCH_POOL = concurrent.futures.ThreadPoolExecutor(
+        max_workers=16, thread_name_prefix='milvus-search')
+    atexit.register(SEARCH_POOL.shutdown)
+    qa_system = EnhancedQASystem(milvus_manager, vector_embedder,
+                                 search_pool=SEARCH_POOL)
+    query_batcher = QueryBatcher(vector_embedder, milvus_manager)
+    logger.info("服务初始化完成")
+
+
+def update_request_stats(kind: str, error: bool = False):
+    next(_req_total)
+    if error:
+        next(_req_err)
+    if kind == 'search':
+        next(_req_search)
+    elif kind == 'answer':
+        next(_req_answer)
+
+
+@app.before_request
+def before_request():
+    # 每个请求只取一次时钟: monotonic 计时 + 复用的 ISO 时间戳,
+    # 处理器里不再反复 datetime.now().isoformat()
+    request.start_time = time.monotonic()
+    request._now_iso = datetime.now().isoformat()
+
+
+@app.after_request
+def after_request(response):
+    if enhanced_logger.is_enabled(ErrorLevel.DEBUG):
+        elapsed = time.monotonic() - request.start_time
+        enhanced_logger.log_error(
+            ErrorLevel.DEBUG, "请求完成",
+            context={'path': request.path, 'elapsed': round(elapsed, 4),
+                     'status': response.status_code,
+                     'at': request._now_iso})
+    return response
+
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': request._now_iso,
+        'services': {
+            'embedder': vector_embedder is not None,
+            'milvus': milvus_manager is not None
+            and milvus_manager.collection is not None,
+        },
+        'stats': system_stats_snapshot(),
+    })
+
+
+# 结果数超过阈值时流式输出, 不在内存里整体攒完再发
+_STREAM_THRESHOLD = 10
+
+
+def _stream_search_response(formatted_results, now_iso):
+    """逐条序列化结果行, 客户端在序列化期间即开始收包"""
+    yield b'{"status":"success","results":['
+    for i, row in enumerate(formatted_results):
+        if i:
+            yield b','
+        yield orjson.dumps(row, option=orjson.OPT_SERIALIZE_NUMPY)
+    yield (b'],"results_count":%d,"timestamp":"%s"}'
+           % (len(formatted_results), now_iso.encode()))
+
+
+@app.route('/api/search', methods=['POST'])
+async def search_documents():
+    payload = request.get_json(silent=True) or {}
+    query_text = (payload.get('query') or '').strip()
+    top_k = min(int(payload.get('top_k', 10)), CONFIG['MAX_TOP_K'])
+
+    if not query_text:
+        update_request_stats('search', error=True)
+        return jsonify({'status': 'error',
+                        'message': 'query は必須です',
+                        'timestamp': request._now_iso}), 400
+
+    if enhanced_logger.is_enabled(ErrorLevel.INFO):
+        enhanced_logger.log_error(
+            ErrorLevel.INFO, "执行搜索查询",
+            context={'query': query_text, 'top_k': top_k,
+                     'at': request._now_iso})
+
+    def search_function():
+        return query_batcher.search(query_text, top_k)
+
+    try:
+        results = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(
+                SEARCH_POOL, search_function),
+            timeout=CONFIG['SEARCH_TIMEOUT'])
+    except asyncio.TimeoutError:
+        update_request_stats('search', error=True)
+        enhanced_logger.log_error(ErrorLevel.ERROR, "检索超时",
+                                  context={'query': query_text})
+        return jsonify({'status': 'error', 'message': '検索がタイムアウトしました',
+                        'timestamp': request._now_iso}), 504
+    except Exception as exc:  # noqa: BLE001
+        update_request_stats('search', error=True)
+        enhanced_logger.log_error(ErrorLevel.ERROR, "检索失败",
+                                  context={'query': query_text},
+                                  exception=exc)
+        return jsonify({'status': 'error', 'message': str(exc),
+                        'timestamp': request._now_iso}), 500
+
+    # 分数取一次进数组, relevance 档位用向量化比较一次算完
+    scores = np.fromiter((r.get('score', 0) for r in results),
+                         dtype=np.float32, count=len(results))
+    relevance_col = np.where(scores > 0.8, 'high',
+                             np.where(scores > 0.6, 'medium', 'low'))
+    formatted_results = [_fmt_result(r, s, rel)
+                         for r, s, rel in zip(results, scores, relevance_col)]
+
+    update_request_stats('search')
+    if len(formatted_results) > _STREAM_THRESHOLD:
+        return Response(_stream_search_response(formatted_results,
+                                                request._now_iso),
+                        mimetype='application/json')
+    return jsonify({
+        'status': 'success',
+        'results': formatted_results,
+        'results_count': len(formatted_results),
+        'timestamp': request._now_iso,
+    })
+
+
+@app.route('/api/answer', methods=['POST'])
+async def answer_question():
+    payload = request.get_json(silent=True) or {}
+    question = (payload.get('question') or '').strip()
+    top_k = min(int(payload.get('top_k', 10)), CONFIG['MAX_TOP_K'])
+
+    if not question:
+        update_request_stats('answer', error=True)
+        return jsonify({'status': 'error',
+                        'message': 'question は必須です',
+                        'timestamp': request._now_iso}), 400
+
+    if enhanced_logger.is_enabled(ErrorLevel.INFO):
+        enhanced_logger.log_error(
+            ErrorLevel.INFO, "执行问答查询",
+            context={'question': question,
+                     'at': request._now_iso})
+
+    def answer_function():
+        return qa_system.answer_question(question, top_k=top_k)
+
+    try:
+        response = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(
+                SEARCH_POOL, answer_function),
+            timeout=CONFIG['SEARCH_TIMEOUT'])
+    except asyncio.TimeoutError:
+        update_request_stats('answer', error=True)
+        enhanced_logger.log_error(ErrorLevel.ERROR, "问答超时",
+                                  context={'question': question})
+        return jsonify({'status': 'error', 'message': '回答がタイムアウトしました',
+                        'timestamp': request._now_iso}), 504
+    except Exception as exc:  # noqa: BLE001
+        update_request_stats('answer', error=True)
+        enhanced_logger.log_error(ErrorLevel.ERROR, "问答失败",
+                                  context={'question': question},
+                                  exception=exc)
+        return jsonify({'status': 'error', 'message': str(exc),
+                        'timestamp': request._now_iso}), 500
+
+    update_request_stats('answer')
+    response['status'] = 'success'
+    response['timestamp'] = request._now_iso
+    return jsonify(response)
+
+
+# PDF 目录列表缓存: 目录 mtime 不变就不重扫
+_PDF_CACHE = {'mtime': 0, 'files': []}
+
+
+def _list_pdf_files(pdf_folder: str) -> List[str]:
+    try:
+        st = os.stat(pdf_folder)
+    except OSError:
+        return []
+    if st.st_mtime_ns != _PDF_CACHE['mtime']:
+        with os.scandir(pdf_folder) as entries:
+            _PDF_CACHE['files'] = [e.name for e in entries
+                                   if e.name[-4:].lower() == '.pdf']
+        _PDF_CACHE['mtime'] = st.st_mtime_ns
+    return _PDF_CACHE['files']
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_enhanced_stats():
+    pdf_files = _list_pdf_files(CONFIG['PDF_FOLDER'])
+    return jsonify({
+        'stats': system_stats_snapshot(),
+        'pdf_count': len(pdf_files),
+        'pdf_files': pdf_files,
+        'error_summary': enhanced_logger.get_error_summary(),
+        'timestamp': request._now_iso,
+    })
+
+
+@app.route('/api/logs', methods=['GET'])
+def get_error_logs():
+    limit = min(int(request.args.get('limit', 50)), 200)
+    records = enhanced_logger.recent_errors(limit)
+    return jsonify({
+        'logs': [{'timestamp': r.timestamp, 'level': r.level,
+                  'message': r.message, 'context': r.context}
+                 for r in records],
+        'timestamp': request._now_iso,
+    })
+
+
+if __name__ == '__main__':
+    if os.getenv('FLASK_DEV'):
+        # 本地调试才走 Flask dev server
+        initialize_services()
+        app.run(host='0.0.0.0', port=5001, debug=True, threaded=True)
+    else:
+        # 生产: 多进程 gunicorn; worker 数/preload/post_fork 钩子
+        # 都在 gunicorn.conf.py 里 (线程类服务必须 fork 后再起)
+        os.execvp('gunicorn', [
+            'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'])
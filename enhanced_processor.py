@@ -0,0 +1,709 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版网页内容处理器
+
+爬取 -> 抽取正文 -> 智能分块 -> 向量化 -> Milvus 入库 的完整流水线。
+对应 local_rag_system.md 中的「文書処理 / 埋め込みモデル / ベクトルDB」部分。
+"""
+
+import os
+import re
+import sys
+import time
+import contextlib
+import hashlib
+import logging
+import multiprocessing
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Tuple, Optional
+
+import numpy as np
+import requests
+from bs4 import BeautifulSoup
+
+try:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    HAS_OPTIMUM = True
+except ImportError:
+    HAS_OPTIMUM = False
+
+try:
+    from pymilvus import (
+        connections, utility, Collection,
+        CollectionSchema, FieldSchema, DataType,
+    )
+    HAS_MILVUS = True
+except ImportError:
+    HAS_MILVUS = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChunkMetadata:
+    """单个分块的元信息"""
+    language: str
+    content_type: str
+    quality_score: float
+    chunk_index: int
+    word_count: int
+
+
+@dataclass
+class ChunkColumns:
+    """分块数据的列式 (SoA) 表示, 与 Milvus 插入列顺序一致
+
+    相比每块一个 11 键 dict, 列式布局省掉逐条 dict 分配,
+    save 阶段可以零拷贝直接作为 insert 列使用。
+    """
+    url: List[str] = field(default_factory=list)
+    title: List[str] = field(default_factory=list)
+    content: List[str] = field(default_factory=list)
+    embedding: List[np.ndarray] = field(default_factory=list)
+    language: List[str] = field(default_factory=list)
+    content_type: List[str] = field(default_factory=list)
+    quality_score: List[float] = field(default_factory=list)
+    chunk_index: List[int] = field(default_factory=list)
+    word_count: List[int] = field(default_factory=list)
+    content_hash: List[str] = field(default_factory=list)
+    crawled_at: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.url)
+
+    def append_chunk(self, url: str, title: str, content: str,
+                     embedding: np.ndarray, metadata: ChunkMetadata,
+                     content_hash: str, crawled_at: str):
+        self.url.append(url)
+        self.title.append(title)
+        self.content.append(content)
+        self.embedding.append(embedding)
+        self.language.append(metadata.language)
+        self.content_type.append(metadata.content_type)
+        self.quality_score.append(metadata.quality_score)
+        self.chunk_index.append(metadata.chunk_index)
+        self.word_count.append(metadata.word_count)
+        self.content_hash.append(content_hash)
+        self.crawled_at.append(crawled_at)
+
+    def extend(self, other: 'ChunkColumns'):
+        """合并另一组列 (跨页攒批用), 逐列 extend, 无逐条开销"""
+        for mine, theirs in zip(self.as_entity_columns(),
+                                other.as_entity_columns()):
+            mine.extend(theirs)
+
+    def as_entity_columns(self) -> List[list]:
+        """按 schema 顺序返回 insert 用的列列表 (无拷贝)"""
+        return [self.url, self.title, self.content, self.embedding,
+                self.language, self.content_type, self.quality_score,
+                self.chunk_index, self.word_count, self.content_hash,
+                self.crawled_at]
+
+
+class SmartChunker:
+    """智能分块器: 按句子边界切分, 附带语言/类型/质量评估"""
+
+    def __init__(self, chunk_size: int = 500, overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def detect_language(self, text: str) -> str:
+        """粗粒度语言检测 (中/日/英)"""
+        cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+        kana = sum(1 for ch in text if '぀' <= ch <= 'ヿ')
+        if kana > len(text) * 0.05:
+            return 'ja'
+        if cjk > len(text) * 0.2:
+            return 'zh'
+        return 'en'
+
+    def detect_content_type(self, text: str) -> str:
+        """根据内容特征判断类型"""
+        if re.search(r'def |class |import |function\(|```', text):
+            return 'code'
+        if re.search(r'\|.+\|.+\|', text):
+            return 'table'
+        if re.search(r'^[-*•]\s', text, re.MULTILINE):
+            return 'list'
+        return 'text'
+
+    def quality_score(self, text: str) -> float:
+        """简单的质量评分: 长度、重复度、符号占比"""
+        if len(text) < 30:
+            return 0.1
+        words = text.split()
+        if not words:
+            return 0.0
+        unique_ratio = len(set(words)) / len(words)
+        alnum_ratio = sum(ch.isalnum() for ch in text) / len(text)
+        score = 0.4 * min(len(text) / self.chunk_size, 1.0) \
+            + 0.3 * unique_ratio + 0.3 * alnum_ratio
+        return round(min(score, 1.0), 3)
+
+    def chunk_content(self, text: str, title: str = '') -> List[Tuple[str, ChunkMetadata]]:
+        """把正文切成带元信息的分块列表"""
+        sentences = re.split(r'(?<=[。．.!?！？\n])', text)
+        chunks = []
+        current = ''
+        for sentence in sentences:
+            if len(current) + len(sentence) > self.chunk_size and current:
+                chunks.append(current.strip())
+                # 保留结尾 overlap 字符作为上下文
+                current = current[-self.overlap:] + sentence
+            else:
+                current += sentence
+        if current.strip():
+            chunks.append(current.strip())
+
+        results = []
+        for i, chunk_text in enumerate(chunks):
+            metadata = ChunkMetadata(
+                language=self.detect_language(chunk_text),
+                content_type=self.detect_content_type(chunk_text),
+                quality_score=self.quality_score(chunk_text),
+                chunk_index=i,
+                word_count=len(chunk_text.split()),
+            )
+            results.append((chunk_text, metadata))
+        return results
+
+
+# 每个页面都会用到的正则, 统一在模块导入时编译一次
+_WS_RE = re.compile(r'\s+')
+_CONTENT_ID_RE = re.compile(r'(content|main|body)', re.I)
+_CONTENT_CLASS_RE = re.compile(r'(content|main|article)', re.I)
+
+
+def _extract_main_content(soup: BeautifulSoup) -> str:
+    """抽取页面正文 (模块级, 供多进程 worker 复用)"""
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
+        tag.decompose()
+
+    main = soup.find(['main', 'article']) or soup.find(
+        attrs={'id': _CONTENT_ID_RE}) or soup.find(
+        attrs={'class': _CONTENT_CLASS_RE})
+    main_content = (main or soup).get_text(separator=' ')
+    return _WS_RE.sub(' ', main_content).strip()
+
+
+# Milvus VARCHAR max_length 按字节计; 预留 "..." 与安全余量
+_CONTENT_BYTE_LIMIT = 7900
+_CONTENT_TRUNC_BYTES = 7896
+
+
+def _truncate_utf8(content: str) -> str:
+    """按 UTF-8 字节数截断, 回退到合法码点和空格边界
+
+    中日文内容每字符 3 字节, 按码点截断会浪费约 1/3 的字节预算;
+    只有超限时才编码截断, 并用 rpartition 避免截在词中间。
+    """
+    if len(content.encode('utf-8')) <= _CONTENT_BYTE_LIMIT:
+        return content
+    truncated = content.encode('utf-8')[:_CONTENT_TRUNC_BYTES].decode(
+        'utf-8', errors='ignore')
+    head, sep, tail = truncated.rpartition(' ')
+    if sep and len(tail) < 40:
+        truncated = head
+    return truncated + '...'
+
+
+# 解析 worker 进程只持有分块器, 模型与 Milvus 连接留在主进程
+_worker_chunker: Optional[SmartChunker] = None
+
+
+def _init_parse_worker():
+    global _worker_chunker
+    _worker_chunker = SmartChunker()
+
+
+def _parse_and_chunk(url: str):
+    """worker: 抓取 + 解析 + 分块, 返回 (url, title, chunks)"""
+    try:
+        resp = requests.get(url, timeout=15)
+        resp.raise_for_status()
+    except requests.RequestException as exc:
+        logger.warning("抓取失败 %s: %s", url, exc)
+        return url, '', []
+    soup = BeautifulSoup(resp.text, 'html.parser')
+    title = soup.title.get_text(strip=True) if soup.title else url
+    content = _extract_main_content(soup)
+    if not content:
+        return url, title, []
+    chunks = _worker_chunker.chunk_content(content, title)
+    return url, title, chunks
+
+
+# 预先用 optimum-cli 导出:
+#   optimum-cli export onnx \
+#       --model paraphrase-multilingual-MiniLM-L12-v2 ./onnx_model
+# CPU 部署可再做 int8 量化:
+#   optimum-cli onnxruntime quantize --arch avx512_vnni ./onnx_model
+ONNX_MODEL_DIR = os.environ.get('RAG_ONNX_MODEL_DIR', './onnx_model')
+
+
+class ONNXSentenceEncoder:
+    """ONNX Runtime 推理封装, 接口与 SentenceTransformer.encode 对齐
+
+    同级 MiniLM 模型社区实测比 eager PyTorch 快 3-4 倍。
+    """
+
+    def __init__(self, model_dir: str):
+        self.model = ORTModelForFeatureExtraction.from_pretrained(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, texts, batch_size: int = 64,
+               normalize_embeddings: bool = True) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            encoded = self.tokenizer(batch, padding=True, truncation=True,
+                                     max_length=512, return_tensors='np')
+            result = self.model(**encoded)
+            hidden = result.last_hidden_state
+            # attention mask 加权平均池化
+            mask = encoded['attention_mask'][:, :, None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / mask.sum(axis=1).clip(1e-9)
+            outputs.append(pooled)
+        embeddings = np.concatenate(outputs, axis=0)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+class EnhancedMilvusProcessor:
+    """网页内容向量化入库处理器"""
+
+    def __init__(self, host: str = 'localhost', port: str = '19530',
+                 collection_name: str = 'web_content',
+                 bulk: bool = False,
+                 bulk_staging_dir: str = '/mnt/minio/milvus-bulk'):
+        self.collection_name = collection_name
+        self.dimension = 384
+        self.chunker = SmartChunker()
+        self.collection: Optional[Collection] = None
+        # bulk=True 时 save_items_bulk 走 parquet + do_bulk_insert 路径,
+        # 绕过流式 insert 的 WAL / 锁开销; 增量更新仍用流式 insert
+        self.bulk = bulk
+        self.bulk_staging_dir = bulk_staging_dir
+        self.bulk_flush_rows = 1_000_000
+        self._bulk_columns = None
+        self._bulk_file_seq = 0
+        # 跨页面去重: 导航/页脚等样板块在整站抓取中大量重复
+        self._seen_hashes: set = set()
+        self._seen_hashes_max = 1_000_000
+        self.stats = {
+            'pages_processed': 0,
+            'chunks_created': 0,
+            'chunks_saved': 0,
+            'filtered_low_quality': 0,
+            'dedup_skipped': 0,
+        }
+
+        if HAS_MILVUS:
+            connections.connect(alias='default', host=host, port=port)
+            logger.info("已连接 Milvus %s:%s", host, port)
+
+        if HAS_OPTIMUM and os.path.isdir(ONNX_MODEL_DIR):
+            self.model = ONNXSentenceEncoder(ONNX_MODEL_DIR)
+            logger.info("ONNX Runtime 编码器加载完成: %s", ONNX_MODEL_DIR)
+        elif HAS_SENTENCE_TRANSFORMERS:
+            self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+            # 纯推理场景: 关闭 autograd, CPU 上吃满所有核, GPU 上用 FP16
+            torch.set_grad_enabled(False)
+            self.model.eval()
+            if torch.cuda.is_available():
+                self.model.half()
+            else:
+                torch.set_num_threads(os.cpu_count() or 8)
+            logger.info("SentenceTransformer 模型加载完成")
+        else:
+            self.model = None
+            logger.warning("sentence-transformers 不可用, 使用简易向量后备方案")
+
+    # ------------------------------------------------------------------
+    # Collection 管理
+    # ------------------------------------------------------------------
+
+    def create_collection(self, index_now: bool = False,
+                          recreate: bool = False):
+        """创建或复用 collection
+
+        默认只建 schema, 索引留到批量导入后的 finalize() 再建,
+        避免流式插入阶段逐行维护索引; 增量更新场景传 index_now=True。
+        已存在的 collection 直接复用, 每次运行都 drop+重建会把
+        全量重索引的代价强加给迭代式导入; 显式传 recreate=True
+        (CLI --recreate) 才会销毁重建。
+        """
+        if not HAS_MILVUS:
+            return
+        if utility.has_collection(self.collection_name):
+            if not recreate:
+                self.collection = Collection(
+                    self.collection_name, consistency_level='Eventually')
+                logger.info("复用已有 collection %s", self.collection_name)
+                return
+            utility.drop_collection(self.collection_name)
+
+        fields = [
+            FieldSchema(name='id', dtype=DataType.INT64,
+                        is_primary=True, auto_id=True),
+            FieldSchema(name='url', dtype=DataType.VARCHAR, max_length=1024),
+            FieldSchema(name='title', dtype=DataType.VARCHAR, max_length=512),
+            FieldSchema(name='content', dtype=DataType.VARCHAR, max_length=8000),
+            # FP16 向量: 带宽与磁盘占用减半, MiniLM 级模型召回损失 <1%
+            FieldSchema(name='embedding', dtype=DataType.FLOAT16_VECTOR,
+                        dim=self.dimension),
+            FieldSchema(name='language', dtype=DataType.VARCHAR, max_length=8),
+            FieldSchema(name='content_type', dtype=DataType.VARCHAR, max_length=16),
+            FieldSchema(name='quality_score', dtype=DataType.FLOAT),
+            FieldSchema(name='chunk_index', dtype=DataType.INT64),
+            FieldSchema(name='word_count', dtype=DataType.INT64),
+            FieldSchema(name='content_hash', dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name='crawled_at', dtype=DataType.VARCHAR, max_length=32),
+        ]
+        schema = CollectionSchema(fields, description='网页内容知识库')
+        # 导入型负载用最终一致即可, 避免每批 insert 等待强一致确认
+        self.collection = Collection(self.collection_name, schema,
+                                     consistency_level='Eventually')
+        logger.info("Collection %s 创建完成", self.collection_name)
+        if index_now:
+            self.create_index()
+
+    def create_index(self):
+        """创建向量索引与标量索引并加载"""
+        if not HAS_MILVUS or self.collection is None:
+            return
+        self.collection.create_index(
+            field_name='embedding',
+            index_params={
+                'index_type': 'HNSW',
+                'metric_type': 'COSINE',
+                'params': {'M': 16, 'efConstruction': 200},
+            },
+        )
+        for field in ('language', 'content_type', 'quality_score'):
+            self.collection.create_index(field_name=field)
+        self.collection.load()
+        logger.info("索引创建完成")
+
+    def finalize(self):
+        """批量导入收尾: flush -> 建索引 -> load"""
+        if not HAS_MILVUS or self.collection is None:
+            return
+        self.collection.flush()
+        self.create_index()
+
+    # ------------------------------------------------------------------
+    # 向量化
+    # ------------------------------------------------------------------
+
+    def _inference_ctx(self):
+        """PyTorch 路径需要 inference_mode, ONNX 路径无此概念"""
+        if isinstance(self.model, ONNXSentenceEncoder) or not HAS_SENTENCE_TRANSFORMERS:
+            return contextlib.nullcontext()
+        return torch.inference_mode()
+
+    def text_to_vector(self, text: str) -> np.ndarray:
+        """单条文本转向量"""
+        if self.model is not None:
+            with self._inference_ctx():
+                embedding = self.model.encode(text, normalize_embeddings=True)
+            return embedding.astype(np.float16)
+        return np.asarray(self._simple_text_vector(text), dtype=np.float16)
+
+    def texts_to_vectors(self, texts: List[str]) -> List[np.ndarray]:
+        """批量文本转向量 (GPU 上批量 encode 远快于逐条)"""
+        if self.model is not None:
+            with self._inference_ctx():
+                embeddings = self.model.encode(
+                    texts, batch_size=64, normalize_embeddings=True)
+            return list(embeddings.astype(np.float16))
+        return [np.asarray(self._simple_text_vector(text), dtype=np.float16)
+                for text in texts]
+
+    def _simple_text_vector(self, text: str) -> List[float]:
+        """无模型时的字符频率后备向量"""
+        # Counter 在 C 层计数, most_common 走 heapq 取 top-k,
+        # 比手写 dict 循环 + 全量 sorted 少三趟 Python 级遍历
+        char_counts = Counter(text)
+
+        vector = [0.0] * self.dimension
+        text_len = len(text)
+        for i, (char, count) in enumerate(
+                char_counts.most_common(self.dimension - 2)):
+            vector[i] = count / text_len
+        vector[self.dimension - 2] = text_len / 10000.0
+        vector[self.dimension - 1] = len(char_counts) / max(text_len, 1)
+        return vector
+
+    # ------------------------------------------------------------------
+    # 页面处理
+    # ------------------------------------------------------------------
+
+    def _extract_page_content(self, soup: BeautifulSoup) -> str:
+        """抽取页面正文"""
+        return _extract_main_content(soup)
+
+    def _build_columns(self, url: str, title: str,
+                       chunks: List[Tuple[str, ChunkMetadata]]) -> ChunkColumns:
+        """批量向量化分块并按列追加待入库数据"""
+        total = len(chunks)
+        # 先过滤低质量分块再向量化, 被丢弃的分块不浪费 encode 时间
+        chunks = [(t, m) for t, m in chunks if m.quality_score >= 0.4]
+        self.stats['filtered_low_quality'] += total - len(chunks)
+
+        # 会话级去重: 重复分块连 encode 带 insert 一起省掉
+        if len(self._seen_hashes) > self._seen_hashes_max:
+            self._seen_hashes.clear()
+        unique_chunks = []
+        for chunk_text, metadata in chunks:
+            h = hashlib.blake2b(chunk_text.encode('utf-8'),
+                                digest_size=16).digest()
+            if h in self._seen_hashes:
+                self.stats['dedup_skipped'] += 1
+                continue
+            self._seen_hashes.add(h)
+            unique_chunks.append((chunk_text, metadata))
+        chunks = unique_chunks
+        cols = ChunkColumns()
+        if not chunks:
+            self.stats['pages_processed'] += 1
+            self.stats['chunks_created'] += total
+            return cols
+        embeddings = self.texts_to_vectors([text for text, _ in chunks])
+        crawled_at = datetime.now().isoformat()
+        for (chunk_text, metadata), embedding in zip(chunks, embeddings):
+            cols.append_chunk(
+                url, title, chunk_text, embedding, metadata,
+                hashlib.md5(chunk_text.encode('utf-8')).hexdigest(),
+                crawled_at)
+        self.stats['pages_processed'] += 1
+        self.stats['chunks_created'] += total
+        return cols
+
+    def process_html_page(self, url: str, html: str,
+                          soup: Optional[BeautifulSoup] = None) \
+            -> ChunkColumns:
+        """解析单个页面, 返回待入库的列式分块数据
+
+        调用方 (如爬虫) 已解析过的 soup 可直接传入, 避免重复解析。
+        """
+        if soup is None:
+            soup = BeautifulSoup(html, 'html.parser')
+        title = soup.title.get_text(strip=True) if soup.title else url
+
+        content = self._extract_page_content(soup)
+        if not content:
+            return ChunkColumns()
+        chunks = self.chunker.chunk_content(content, title)
+        return self._build_columns(url, title, chunks)
+
+    def process_urls_parallel(self, urls: List[str],
+                              processes: Optional[int] = None) -> int:
+        """多进程 map / 主进程 reduce 流水线
+
+        worker 进程做纯 CPU 的 抓取+解析+分块 (绕开 GIL),
+        主进程收分块批次后批量 encode 并写入 Milvus。
+        """
+        saved = 0
+        processes = processes or os.cpu_count() or 4
+        with multiprocessing.Pool(processes,
+                                  initializer=_init_parse_worker) as pool:
+            for url, title, chunks in pool.imap_unordered(_parse_and_chunk, urls):
+                if not chunks:
+                    continue
+                saved += self.save_columns(self._build_columns(url, title, chunks))
+        return saved
+
+    # ------------------------------------------------------------------
+    # 入库
+    # ------------------------------------------------------------------
+
+    def save_columns(self, cols: ChunkColumns,
+                     flush: bool = False) -> int:
+        """列式入库: 流水线主路径, 不经过逐条 dict
+
+        Flush 是全局同步操作, 默认不做 —— 收尾由 finalize()
+        统一刷一次; 需要立即可查时才传 flush=True。
+        """
+        if not len(cols) or not HAS_MILVUS:
+            return 0
+        content = cols.content
+        for i, text in enumerate(content):
+            content[i] = _truncate_utf8(text)
+
+        if self.bulk and HAS_PYARROW:
+            if self._bulk_columns is None:
+                self._bulk_columns = {key: [] for key in (
+                    'url', 'title', 'content', 'embedding', 'language',
+                    'content_type', 'quality_score', 'chunk_index',
+                    'word_count', 'content_hash', 'crawled_at')}
+            for key in self._bulk_columns:
+                self._bulk_columns[key].extend(getattr(cols, key))
+            if len(self._bulk_columns['url']) >= self.bulk_flush_rows:
+                self.flush_bulk()
+            return len(cols)
+
+        if self.collection is None:
+            return 0
+        self.collection.insert(cols.as_entity_columns())
+        if flush:
+            self.collection.flush()
+        self.stats['chunks_saved'] += len(cols)
+        return len(cols)
+
+    def save_items(self, items: List[dict],
+                   flush: bool = False) -> int:
+        """流式插入一批分块 (dict 条目, 供增量更新调用方使用)
+
+        与 save_columns 同理默认不刷盘, 收尾走 finalize()。
+        """
+        if not items or not HAS_MILVUS or self.collection is None:
+            return 0
+
+        # 单趟融合: 预分配各列, 截断与列拆分在同一次遍历里完成
+        n = len(items)
+        url_col = [None] * n
+        title_col = [None] * n
+        content_col = [None] * n
+        embedding_col = [None] * n
+        language_col = [None] * n
+        content_type_col = [None] * n
+        quality_col = [None] * n
+        chunk_index_col = [None] * n
+        word_count_col = [None] * n
+        hash_col = [None] * n
+        crawled_at_col = [None] * n
+        truncated_count = 0
+        for i, item in enumerate(items):
+            content = _truncate_utf8(item['content'])
+            if content is not item['content']:
+                truncated_count += 1
+            url_col[i] = item['url']
+            title_col[i] = item['title']
+            content_col[i] = content
+            embedding_col[i] = item['embedding']
+            language_col[i] = item['language']
+            content_type_col[i] = item['content_type']
+            quality_col[i] = item['quality_score']
+            chunk_index_col[i] = item['chunk_index']
+            word_count_col[i] = item['word_count']
+            hash_col[i] = item['content_hash']
+            crawled_at_col[i] = item['crawled_at']
+        if truncated_count:
+            logger.info("本批 %d/%d 条内容过长已截断", truncated_count, n)
+
+        self.collection.insert([
+            url_col, title_col, content_col, embedding_col, language_col,
+            content_type_col, quality_col, chunk_index_col, word_count_col,
+            hash_col, crawled_at_col,
+        ])
+        if flush:
+            self.collection.flush()
+        self.stats['chunks_saved'] += n
+        return n
+
+    def save_items_bulk(self, items: List[dict]) -> int:
+        """批量导入路径: 列式缓存 -> parquet -> do_bulk_insert
+
+        一次性大规模抓取入库时绕过流式 insert 的 WAL 与锁开销;
+        需要 bulk=True 且 pyarrow 可用, 否则回退到流式 insert。
+        """
+        if not items:
+            return 0
+        if not (self.bulk and HAS_PYARROW and HAS_MILVUS):
+            return self.save_items(items)
+
+        if self._bulk_columns is None:
+            self._bulk_columns = {key: [] for key in items[0]}
+        for item in items:
+            content = _truncate_utf8(item['content'])
+            for key, value in item.items():
+                self._bulk_columns[key].append(
+                    content if key == 'content' else value)
+
+        buffered = len(self._bulk_columns['url'])
+        if buffered >= self.bulk_flush_rows:
+            self.flush_bulk()
+        return len(items)
+
+    def flush_bulk(self):
+        """把列式缓存写成 parquet 并触发 Milvus bulk insert"""
+        if not self._bulk_columns or not self._bulk_columns['url']:
+            return
+        os.makedirs(self.bulk_staging_dir, exist_ok=True)
+        table = pa.table(self._bulk_columns)
+        self._bulk_file_seq += 1
+        parquet_path = os.path.join(
+            self.bulk_staging_dir,
+            '%s_%04d.parquet' % (self.collection_name, self._bulk_file_seq))
+        pq.write_table(table, parquet_path)
+        task_id = utility.do_bulk_insert(
+            collection_name=self.collection_name, files=[parquet_path])
+        logger.info("bulk insert 任务已提交: %s (%d 行)",
+                    task_id, len(self._bulk_columns['url']))
+        self.stats['chunks_saved'] += len(self._bulk_columns['url'])
+        self._bulk_columns = None
+
+
+def test_enhanced_processor(urls: Optional[List[str]] = None,
+                            recreate: bool = False):
+    """端到端小规模验证"""
+    urls = urls or ['https://docs.python.org/3/tutorial/index.html']
+    processor = EnhancedMilvusProcessor()
+    processor.create_collection(recreate=recreate)
+
+    if len(urls) > 1:
+        processor.process_urls_parallel(urls)
+    else:
+        session = requests.Session()
+        for url in urls:
+            try:
+                resp = session.get(url, timeout=15)
+                resp.raise_for_status()
+            except requests.RequestException as exc:
+                logger.warning("抓取失败 %s: %s", url, exc)
+                continue
+            cols = processor.process_html_page(url, resp.text)
+            processor.save_columns(cols)
+    if processor.bulk:
+        processor.flush_bulk()
+    processor.finalize()
+
+    logger.info("处理统计: %s", processor.stats)
+    return processor
+
+
+def main():
+    args = sys.argv[1:]
+    recreate = '--recreate' in args
+    urls = [a for a in args if not a.startswith('--')] or None
+    test_enhanced_processor(urls, recreate=recreate)
+
+
+if __name__ == '__main__':
+    main()
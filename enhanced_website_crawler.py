@@ -0,0 +1,646 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强版网站爬虫
+
+站内 BFS 抓取 + 语言/质量分块入库 (经 EnhancedMilvusProcessor)。
+aiohttp 可用时走单线程事件循环的异步抓取路径;
+否则回退到 requests + 线程池的同步路径。
+"""
+
+import os
+import re
+import json
+import time
+import socket
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    BS_PARSER = 'lxml'
+except ImportError:
+    BS_PARSER = 'html.parser'
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+try:
+    import xxhash
+
+    def _url_hash(url: str) -> int:
+        return xxhash.xxh64_intdigest(url)
+except ImportError:
+    import hashlib
+
+    def _url_hash(url: str) -> int:
+        return int.from_bytes(
+            hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(),
+            'big')
+
+try:
+    from pybloom_live import ScalableBloomFilter
+    HAS_BLOOM = True
+except ImportError:
+    HAS_BLOOM = False
+
+try:
+    import cchardet as chardet  # C 实现, 比纯 Python chardet 快 10-100x
+    HAS_CHARDET = True
+except ImportError:
+    try:
+        import chardet
+        HAS_CHARDET = True
+    except ImportError:
+        HAS_CHARDET = False
+
+from enhanced_logger import enhanced_logger, ErrorLevel, retry_on_failure
+from enhanced_processor import ChunkColumns, EnhancedMilvusProcessor
+
+logger = logging.getLogger(__name__)
+
+# <meta charset=...> 先于全文检测; 检测也只采样前 16KB
+_META_CHARSET_RE = re.compile(br'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+_DETECT_SAMPLE = 16384
+
+# 单页正文上限: 超过的多半是被错标成 text/html 的下载件,
+# 读进来只会撑爆内存和分块器
+_MAX_HTML_BYTES = 5 * 1024 * 1024
+
+# 链接发现只要 href, 正则扫原文比任何 DOM/标签解析都便宜;
+# 命中数可疑地少时再退回解析器路径 (frameset/JS 生成页)
+_HREF_RE = re.compile(
+    r'<a[^>]+href\s*=\s*(?:"([^"]+)"|\'([^\']+)\'|([^\s>]+))', re.I)
+
+# ---------------------------------------------------------------------------
+# 进程级 DNS 缓存: 同一域名抓几百次, 每次 getaddrinfo 都是一次解析往返;
+# 异步路径由 TCPConnector(ttl_dns_cache) 覆盖, 这里给同步路径同样的待遇
+# ---------------------------------------------------------------------------
+_DNS_TTL = 3600
+_dns_cache: Dict[tuple, tuple] = {}
+_dns_lock = threading.Lock()
+_orig_getaddrinfo = None
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_lock:
+        cached = _dns_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+    result = _orig_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_lock:
+        _dns_cache[key] = (now + _DNS_TTL, result)
+    return result
+
+
+def _install_dns_cache():
+    """幂等安装 getaddrinfo 缓存"""
+    global _orig_getaddrinfo
+    if _orig_getaddrinfo is None:
+        _orig_getaddrinfo = socket.getaddrinfo
+        socket.getaddrinfo = _cached_getaddrinfo
+
+
+@dataclass
+class EnhancedCrawlConfig:
+    """爬虫配置"""
+    base_url: str
+    max_pages: int = 100
+    max_depth: int = 3
+    timeout: int = 10
+    delay_between_requests: float = 2.0
+    # 抓取是 I/O 密集: worker 数按隐藏延迟的需要取, 不按核数;
+    # 3 个 worker 配 2s 礼貌延迟时吞吐完全被串行化
+    concurrent_workers: int = max(32, (os.cpu_count() or 4) * 5)
+    # 连接器/线程池允许的最大并行请求数上限
+    max_parallel_requests: int = 50
+    # 同步路径 urllib3 连接池大小; 默认随 worker 数走,
+    # 过小会悄悄丢弃热连接, 每次重付 DNS+TCP+TLS 握手
+    pool_maxsize: int = 0
+    user_agent: str = ('Mozilla/5.0 (compatible; EnhancedCrawler/1.0; '
+                       '+rag-with-mcp)')
+    exclude_patterns: List[str] = field(default_factory=lambda: [
+        'javascript:', 'mailto:', 'tel:', '.pdf', '.doc', '.zip',
+        'logout', 'login', 'admin'])
+
+
+class EnhancedWebsiteCrawler:
+    """站内递归爬虫"""
+
+    def __init__(self, config: EnhancedCrawlConfig,
+                 processor: Optional[EnhancedMilvusProcessor] = None):
+        self.config = config
+        self.processor = processor
+        self.base_domain = urlparse(config.base_url).netloc
+        # 黑名单合成一个不区分大小写的正则: 每个 URL 一次 C 层扫描,
+        # 代替 逐模式 in + url.lower() 的临时字符串
+        self._exclude_re = re.compile(
+            '|'.join(map(re.escape, config.exclude_patterns)),
+            re.I) if config.exclude_patterns else None
+        # robots.txt 只在构造时抓一次并解析, 之后 can_fetch 是纯内存
+        # 查询; 单域爬虫一个解析器就够, 多域时可换成按 host 的缓存
+        self._robots = RobotFileParser()
+        self._robots.set_url(urljoin(config.base_url, '/robots.txt'))
+        try:
+            self._robots.read()
+        except Exception:  # noqa: BLE001
+            # 取不到 robots.txt 时按全部允许处理
+            self._robots = None
+        _install_dns_cache()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': config.user_agent,
+            'Connection': 'keep-alive',
+        })
+        pool_maxsize = config.pool_maxsize \
+            or max(32, config.concurrent_workers * 2)
+        adapter = HTTPAdapter(
+            pool_connections=32, pool_maxsize=pool_maxsize,
+            max_retries=Retry(total=3, backoff_factor=0.3,
+                              status_forcelist=[429, 500, 502, 503, 504]))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # URL 认领和统计累加是两类互不相关的临界区,
+        # 分两把锁, 认领热路径不再被统计更新顶住
+        self._url_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # 每主机礼貌间隔: 记录各 host 下次可以发请求的时刻,
+        # worker 只睡到自己排到的时间点, 不再每页固定睡满 delay
+        self._host_next_ok: Dict[str, float] = {}
+        self._host_lock = threading.Lock()
+        # 跨页攒批: 每页几个 chunk 就发一次 insert 太碎,
+        # 攒到阈值再由单独的入库线程整批写, 抓取 worker 不等 Milvus
+        self._pending = ChunkColumns()
+        self._pending_lock = threading.Lock()
+        self._flush_threshold = 256
+        self._save_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='milvus-save') \
+            if processor is not None else None
+        # 去重主体: Bloom 过滤器 ~10bit/URL, 大规模抓取不再为每个
+        # 已访问 URL 存 100+ 字节的字符串; 精确集合只留作报告用,
+        # 超过上限后停止记录 (去重照常, 报告截断)
+        self._bloom = ScalableBloomFilter(
+            initial_capacity=config.max_pages * 2,
+            error_rate=0.001) if HAS_BLOOM else None
+        self._visited_count = 0
+        self._report_url_cap = 10000
+        # 集合回退路径存 64 位哈希键而不是 URL 字符串:
+        # 每条 ~8 字节+集合开销, 且整型哈希远快于长串 SipHash
+        self._visited_keys: Set[int] = set()
+        self.visited_urls: Set[str] = set()
+        self.failed_urls: Set[str] = set()
+        self.stats = {
+            'pages_crawled': 0,
+            'pages_failed': 0,
+            'chunks_saved': 0,
+            'high_quality_chunks': 0,
+            'languages_detected': Counter(),
+            'started_at': None,
+            'finished_at': None,
+        }
+
+    # ------------------------------------------------------------------
+    # URL 过滤与链接抽取
+    # ------------------------------------------------------------------
+
+    def _is_valid_url(self, url: str) -> bool:
+        """仅站内 http(s) 链接, 排除黑名单模式"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return False
+        if parsed.netloc != self.base_domain:
+            return False
+        if self._exclude_re is not None and self._exclude_re.search(url):
+            return False
+        if self._robots is not None and \
+                not self._robots.can_fetch(self.config.user_agent, url):
+            return False
+        return True
+
+    def _parse_document(self, html: str, url: str):
+        """解析页面, 返回 (title, 文档对象)
+
+        selectolax 可用时用其 C 解析器做标题/链接抽取 (只扫标签,
+        不建完整 DOM); 否则退回 BeautifulSoup。
+        """
+        if HAS_SELECTOLAX:
+            tree = SelectolaxParser(html)
+            title_node = tree.css_first('title')
+            title = title_node.text(strip=True) if title_node else url
+            return title, tree
+        soup = BeautifulSoup(html, BS_PARSER)
+        title = soup.title.get_text(strip=True) if soup.title else url
+        return title, soup
+
+    def _extract_links(self, doc, base_url: str,
+                       html: str = '') -> List[str]:
+        """抽取站内链接: 正则直扫 html, 退回已解析文档对象"""
+        hrefs = None
+        if html:
+            matches = [m.group(1) or m.group(2) or m.group(3)
+                       for m in _HREF_RE.finditer(html)]
+            if matches:
+                hrefs = matches
+        if hrefs is None:
+            if HAS_SELECTOLAX and isinstance(doc, SelectolaxParser):
+                hrefs = (node.attributes.get('href')
+                         for node in doc.css('a[href]'))
+            else:
+                hrefs = (anchor['href']
+                         for anchor in doc.find_all('a', href=True))
+        links = []
+        for href in hrefs:
+            if not href:
+                continue
+            url = urljoin(base_url, href)
+            url = url.split('#')[0]
+            if url and self._is_valid_url(url):
+                links.append(url)
+        return links
+
+    # ------------------------------------------------------------------
+    # 抓取
+    # ------------------------------------------------------------------
+
+    def _reserve_slot(self, url: str) -> float:
+        """为该 URL 的主机预约一个请求时隙, 返回需等待的秒数
+
+        令牌桶的退化形式: 每主机一个"下次可发"时间戳,
+        预约即推后 delay, 多 worker 天然排队而不会同时打同一主机。
+        """
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        with self._host_lock:
+            next_ok = self._host_next_ok.get(host, now)
+            wait = max(0.0, next_ok - now)
+            self._host_next_ok[host] = \
+                max(next_ok, now) + self.config.delay_between_requests
+        return wait
+
+    @staticmethod
+    def _headers_ok(headers) -> bool:
+        """按响应头拒掉非 HTML 和超大正文, 不读 body"""
+        ctype = headers.get('Content-Type', '')
+        if ctype and not ctype.lower().startswith('text/html'):
+            return False
+        clen = headers.get('Content-Length')
+        if clen and clen.isdigit() and int(clen) > _MAX_HTML_BYTES:
+            return False
+        return True
+
+    @staticmethod
+    def _decode_html(content: bytes, declared: Optional[str]) -> str:
+        """字节流解码: 响应头 -> meta charset -> chardet 采样 -> utf-8"""
+        encoding = declared if declared not in (
+            None, 'ISO-8859-1', 'ascii') else None
+        if encoding is None:
+            # 页面自带 meta charset 时直接采纳, 完全跳过检测
+            meta = _META_CHARSET_RE.search(content[:4096])
+            if meta:
+                encoding = meta.group(1).decode('ascii', 'ignore')
+            elif HAS_CHARDET:
+                detected = chardet.detect(content[:_DETECT_SAMPLE])
+                encoding = detected.get('encoding')
+        try:
+            return content.decode(encoding or 'utf-8', errors='replace')
+        except LookupError:
+            return content.decode('utf-8', errors='replace')
+
+    @retry_on_failure(max_retries=2, base_delay=1.0)
+    def _fetch_page(self, url: str) -> Optional[Tuple[str, str, object]]:
+        """同步抓取单页, 返回 (html, title)
+
+        stream=True 使得头检查在读 body 之前完成,
+        非 HTML / 超大响应只付一次握手就被丢弃。
+        """
+        response = self.session.get(url, timeout=self.config.timeout,
+                                    allow_redirects=True, stream=True)
+        try:
+            response.raise_for_status()
+            if not self._headers_ok(response.headers):
+                return None
+            # 没有 Content-Length 的响应也硬截在上限处
+            content = response.raw.read(_MAX_HTML_BYTES + 1,
+                                        decode_content=True)
+        finally:
+            response.close()
+        if len(content) > _MAX_HTML_BYTES:
+            return None
+        html = self._decode_html(content, response.encoding)
+
+        # 每页只解析一次, 标题/链接/入库共用
+        title, doc = self._parse_document(html, url)
+        return html, title, doc
+
+    async def _fetch_page_async(self, session, url: str) \
+            -> Optional[Tuple[str, str, object]]:
+        """异步抓取单页, 返回 (html, title, 解析文档)"""
+        timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+        async with session.get(url, timeout=timeout,
+                               allow_redirects=True) as response:
+            response.raise_for_status()
+            if not self._headers_ok(response.headers):
+                return None
+            content = await response.content.read(_MAX_HTML_BYTES + 1)
+            if len(content) > _MAX_HTML_BYTES:
+                return None
+            html = self._decode_html(content, response.charset)
+        title, doc = self._parse_document(html, url)
+        return html, title, doc
+
+    # ------------------------------------------------------------------
+    # 单页处理 (抓取后公用)
+    # ------------------------------------------------------------------
+
+    def _process_page(self, url: str, depth: int, html: str, title: str,
+                      doc) -> List[Tuple[str, int]]:
+        """解析入库并返回待入队的新链接 (复用抓取时的解析结果)"""
+        saved = 0
+        cols = None
+        if self.processor is not None:
+            # 处理器需要完整 DOM 时才传 soup; selectolax 树传不进去,
+            # 让处理器自己解析一次 (总解析次数仍是每页一次 BS + 一次标签扫)
+            soup = doc if isinstance(doc, BeautifulSoup) else None
+            cols = self.processor.process_html_page(url, html, soup=soup)
+            if len(cols):
+                saved = len(cols)
+                self._buffer_columns(cols)
+
+        # 聚合在锁外做完, 临界区只剩一把批量累加
+        high_quality = 0
+        lang_counts: Counter = Counter()
+        if cols is not None:
+            high_quality = sum(1 for score in cols.quality_score
+                               if score >= 0.7)
+            lang_counts.update(cols.language)
+
+        with self._stats_lock:
+            self.stats['pages_crawled'] += 1
+            self.stats['chunks_saved'] += saved
+            self.stats['high_quality_chunks'] += high_quality
+            if lang_counts:
+                self.stats['languages_detected'].update(lang_counts)
+
+        if depth >= self.config.max_depth:
+            return []
+        return [(link, depth + 1)
+                for link in self._extract_links(doc, url, html=html)]
+
+    def _buffer_columns(self, cols):
+        """把单页的列追加进攒批缓冲, 满阈值时整批移交入库线程"""
+        full = None
+        with self._pending_lock:
+            self._pending.extend(cols)
+            if len(self._pending) >= self._flush_threshold:
+                full = self._pending
+                self._pending = ChunkColumns()
+        if full is not None:
+            self._save_executor.submit(self.processor.save_columns, full)
+
+    def _flush_pending(self):
+        """抓取结束时冲洗残余缓冲并等待入库线程清空"""
+        if self._save_executor is None:
+            return
+        with self._pending_lock:
+            rest, self._pending = self._pending, ChunkColumns()
+        if len(rest):
+            self._save_executor.submit(self.processor.save_columns, rest)
+        self._save_executor.shutdown(wait=True)
+
+    @staticmethod
+    def _canonical(url: str) -> str:
+        """规范化 URL: 小写 scheme/host, 去默认端口与 fragment"""
+        parsed = urlparse(url)
+        netloc = parsed.netloc.lower()
+        if (parsed.scheme == 'http' and netloc.endswith(':80')) or \
+                (parsed.scheme == 'https' and netloc.endswith(':443')):
+            netloc = netloc.rsplit(':', 1)[0]
+        return urlunparse((parsed.scheme.lower(), netloc, parsed.path,
+                           parsed.params, parsed.query, ''))
+
+    def _try_claim(self, url: str) -> bool:
+        """原子地认领一个未访问 URL; False 表示重复或已到页数上限"""
+        canonical = self._canonical(url)
+        key = _url_hash(canonical)
+        with self._url_lock:
+            if self._visited_count >= self.config.max_pages:
+                return False
+            if self._bloom is not None:
+                if canonical in self._bloom:
+                    return False
+                self._bloom.add(canonical)
+            elif key in self._visited_keys:
+                return False
+            else:
+                self._visited_keys.add(key)
+            self._visited_count += 1
+            if len(self.visited_urls) < self._report_url_cap:
+                self.visited_urls.add(url)
+            return True
+
+    def _record_failure(self, url: str):
+        with self._url_lock:
+            self.failed_urls.add(url)
+        with self._stats_lock:
+            self.stats['pages_failed'] += 1
+
+    def _crawl_page(self, url: str, depth: int) -> List[Tuple[str, int]]:
+        """同步路径的单页抓取+处理"""
+        if not self._try_claim(url):
+            return []
+        wait = self._reserve_slot(url)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            fetched = self._fetch_page(url)
+        except Exception as exc:  # noqa: BLE001
+            self._record_failure(url)
+            enhanced_logger.log_error(ErrorLevel.WARNING, "页面抓取失败",
+                                      context={'url': url}, exception=exc)
+            return []
+        if fetched is None:
+            return []
+        return self._process_page(url, depth, *fetched)
+
+    # ------------------------------------------------------------------
+    # 调度
+    # ------------------------------------------------------------------
+
+    def crawl(self) -> Dict:
+        """抓取入口: 优先异步事件循环, 无 aiohttp 时回退线程池"""
+        self.stats['started_at'] = datetime.now().isoformat()
+        if HAS_AIOHTTP:
+            asyncio.run(self._crawl_async())
+        else:
+            self._crawl_threaded()
+        self.stats['finished_at'] = datetime.now().isoformat()
+        if self.processor is not None:
+            self._flush_pending()
+            self.processor.finalize()
+        return self.stats
+
+    async def _crawl_async(self):
+        """异步调度: 一个事件循环 + N 个 worker 协程
+
+        连接池做 keep-alive 与 DNS 缓存, 站点礼貌延迟用
+        asyncio.sleep, 等待期间不占用任何线程。
+        """
+        url_queue: asyncio.Queue = asyncio.Queue()
+        await url_queue.put((self.config.base_url, 0))
+        connector = aiohttp.TCPConnector(
+            limit=self.config.max_parallel_requests, limit_per_host=4,
+            ttl_dns_cache=3600, keepalive_timeout=120)
+
+        async with aiohttp.ClientSession(
+                connector=connector,
+                headers={'User-Agent': self.config.user_agent}) as session:
+
+            async def worker():
+                while True:
+                    url, depth = await url_queue.get()
+                    try:
+                        if not self._try_claim(url):
+                            continue
+                        wait = self._reserve_slot(url)
+                        if wait > 0:
+                            await asyncio.sleep(wait)
+                        try:
+                            fetched = await self._fetch_page_async(
+                                session, url)
+                        except Exception as exc:  # noqa: BLE001
+                            self._record_failure(url)
+                            enhanced_logger.log_error(
+                                ErrorLevel.WARNING, "页面抓取失败",
+                                context={'url': url}, exception=exc)
+                            continue
+                        if fetched is None:
+                            continue
+                        try:
+                            # 解析/入库是 CPU 工作, 丢到线程免得阻塞事件循环
+                            links = await asyncio.to_thread(
+                                self._process_page, url, depth, *fetched)
+                        except Exception as exc:  # noqa: BLE001
+                            # 处理异常逃出去会杀掉 worker 协程;
+                            # 收尾靠 join(), worker 死光队列就排空不完
+                            self._record_failure(url)
+                            enhanced_logger.log_error(
+                                ErrorLevel.WARNING, "页面处理失败",
+                                context={'url': url}, exception=exc)
+                            continue
+                        for item in links:
+                            await url_queue.put(item)
+                    finally:
+                        url_queue.task_done()
+
+            workers = [asyncio.create_task(worker())
+                       for _ in range(self.config.concurrent_workers)]
+            # join 在最后一个条目 task_done 后立即返回, 没有空转
+            # 超时尾巴; 此时 worker 都停在 get() 上, 取消是安全的
+            await url_queue.join()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def _crawl_threaded(self):
+        """同步回退调度: 线程池 + 完成事件驱动收割"""
+        pending: List[Tuple[str, int]] = [(self.config.base_url, 0)]
+        with ThreadPoolExecutor(
+                max_workers=self.config.concurrent_workers) as executor:
+            futures = set()
+            while pending or futures:
+                while pending:
+                    url, depth = pending.pop()
+                    futures.add(
+                        executor.submit(self._crawl_page, url, depth))
+                # 在首个 future 完成时精确唤醒, 不做 100ms 轮询全表扫描
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.extend(future.result() or [])
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_url_array(f, urls):
+        """逐条序列化 URL 数组元素, 不物化整个列表的 JSON 文本"""
+        first = True
+        for url in sorted(urls):
+            f.write('\n    ' if first else ',\n    ')
+            f.write(_json_dumps(url))
+            first = False
+        f.write('\n  ]' if not first else ']')
+
+    def save_report(self, path: str = 'crawl_report.json'):
+        """流式输出抓取报告
+
+        外层骨架手写, URL 列表逐条写出; 大规模抓取时不再为
+        整份报告在内存里先攒一个大 dict 再一次性 dump。
+        """
+        config = {
+            'base_url': self.config.base_url,
+            'max_pages': self.config.max_pages,
+            'max_depth': self.config.max_depth,
+        }
+        stats = dict(self.stats)
+        stats['languages_detected'] = dict(stats['languages_detected'])
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{\n  "config": ')
+            f.write(_json_dumps(config))
+            f.write(',\n  "stats": ')
+            f.write(_json_dumps(stats))
+            f.write(',\n  "visited_urls": [')
+            self._write_url_array(f, self.visited_urls)
+            f.write(',\n  "failed_urls": [')
+            self._write_url_array(f, self.failed_urls)
+            f.write('\n}\n')
+        logger.info("报告已保存: %s", path)
+
+
+def main():
+    config = EnhancedCrawlConfig(base_url='https://www.kandenko.co.jp/')
+    processor = EnhancedMilvusProcessor()
+    processor.create_collection()
+    crawler = EnhancedWebsiteCrawler(config, processor)
+    stats = crawler.crawl()
+    crawler.save_report()
+    logger.info("抓取完成: %s", stats)
+
+
+if __name__ == '__main__':
+    main()
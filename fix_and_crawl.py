@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+修复搜索问题并重新抓取关电工官网
+
+整库重建 website_content 集合: 抓取 -> 向量化 -> 分批入库。
+"""
+
+import logging
+import argparse
+
+from pdf_vector_system import MilvusPDFManager, VectorEmbedder
+from website_crawler import HAS_UVLOOP, CrawlConfig, WebsiteCrawler
+
+if HAS_UVLOOP:
+    import uvloop
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = 'website_content'
+
+
+def create_kandenko_config() -> CrawlConfig:
+    """关电工官网的抓取配置"""
+    return CrawlConfig(
+        base_url='https://www.kandenko.co.jp/',
+        max_pages=50,
+        max_depth=2,
+        delay_between_requests=1.0,
+        insert_batch_size=2048,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='修复并重新抓取')
+    parser.add_argument('--yes', action='store_true',
+                        help='跳过确认, 便于脚本化/并行批跑')
+    args = parser.parse_args()
+
+    if HAS_UVLOOP:
+        # C 实现的事件循环, 异步入库路径白拿 2-4x
+        uvloop.install()
+
+    config = create_kandenko_config()
+    print("=== 修复并重新抓取 ===")
+    print("目标: %s (最多 %d 页)" % (config.base_url, config.max_pages))
+    if not args.yes and input("继续？(y/N): ").lower() != 'y':
+        print("已取消")
+        return
+
+    embedder = VectorEmbedder()
+    manager = MilvusPDFManager(collection_name=COLLECTION_NAME,
+                               dimension=embedder.dimension)
+    manager.create_collection()
+
+    crawler = WebsiteCrawler(config, embedder=embedder, manager=manager)
+    # 边抓边入库, 不等抓完再统一 save
+    stats = crawler.crawl_with_ingest()
+    saved = stats.get('chunks_saved', 0)
+    manager.load_collection()
+    crawler.save_report()
+    logger.info("完成: %s, 入库 %d 块", stats, saved)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+修复编码问题的重新抓取
+
+改进 BeautifulSoup 编码处理: 带 Accept-Language: ja 请求头重抓日文站,
+先清理旧集合再分批重新入库。
+"""
+
+import logging
+import argparse
+
+from _milvus import HAS_MILVUS, get_client
+from pdf_vector_system import MilvusPDFManager, VectorEmbedder
+from website_crawler import HAS_UVLOOP, CrawlConfig, WebsiteCrawler
+
+if HAS_UVLOOP:
+    import uvloop
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = 'website_content'
+
+
+def clean_existing_collection(client=None):
+    """删除乱码数据所在的旧集合 (复用进程级客户端)"""
+    if not HAS_MILVUS:
+        return
+    client = client or get_client()
+    if client.has_collection(COLLECTION_NAME):
+        client.drop_collection(COLLECTION_NAME)
+        logger.info("旧集合已删除: %s", COLLECTION_NAME)
+
+
+def create_kandenko_smart_config() -> CrawlConfig:
+    """日文站点的抓取配置 (显式 Accept-Language)"""
+    return CrawlConfig(
+        base_url='https://www.kandenko.co.jp/',
+        max_pages=50,
+        max_depth=2,
+        delay_between_requests=1.0,
+        insert_batch_size=2048,
+        headers={
+            'User-Agent': 'Mozilla/5.0 (compatible; FixCrawler/1.0)',
+            'Accept-Language': 'ja,en;q=0.8',
+            'Accept-Charset': 'utf-8',
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='修复编码并重新抓取')
+    parser.add_argument('--yes', action='store_true',
+                        help='跳过确认, 便于脚本化/并行批跑')
+    args = parser.parse_args()
+
+    if HAS_UVLOOP:
+        # C 实现的事件循环, 异步入库路径白拿 2-4x
+        uvloop.install()
+
+    config = create_kandenko_smart_config()
+    print("=== 修复编码并重新抓取 ===")
+    print("目标: %s (最多 %d 页)" % (config.base_url, config.max_pages))
+    if not args.yes and input("继续？(y/N): ").lower() != 'y':
+        print("已取消")
+        return
+
+    clean_existing_collection(get_client() if HAS_MILVUS else None)
+
+    embedder = VectorEmbedder()
+    manager = MilvusPDFManager(collection_name=COLLECTION_NAME,
+                               dimension=embedder.dimension)
+    manager.create_collection()
+
+    crawler = WebsiteCrawler(config, embedder=embedder, manager=manager)
+    # 边抓边入库, 不等抓完再统一 save
+    stats = crawler.crawl_with_ingest()
+    saved = stats.get('chunks_saved', 0)
+    manager.load_collection()
+    crawler.save_report('fix_encoding_report.json')
+    logger.info("完成: %s, 入库 %d 块", stats, saved)
+
+
+if __name__ == '__main__':
+    main()
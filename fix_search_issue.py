@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+修复 PDF 搜索问题
+
+增量修复 pdf_chunks 集合: 解析与向量化手册 PDF (带磁盘缓存),
+按内容指纹跳过已入库分块, 只补插增量; 不删除既有数据。
+可选 --smoke 跑测试查询验证检索。
+"""
+
+import os
+import pickle
+import asyncio
+import hashlib
+import logging
+import argparse
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from pdf_vector_system import (HAS_ASYNC_MILVUS, MilvusPDFManager,
+                               PDFProcessor, TextChunk, VectorEmbedder)
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s [%(levelname)s] %(message)s')
+logger = logging.getLogger(__name__)
+
+PDF_PATH = 'high_takusoukun_web_manual_separate.pdf'
+COLLECTION_NAME = 'pdf_chunks'
+# 每批一次 insert RPC, 控制单条 gRPC 消息大小;
+# 并发在途请求数: 批大小与并发都按 先扫批再扫并发 的方式调过,
+# 2048×4 之后继续加并发不再涨吞吐
+INSERT_BATCH = 2048
+INSERT_CONCURRENCY = 4
+# 分块+向量缓存目录: 调索引参数反复重跑时, PDF 解析和向量化
+# 才是大头, 缓存命中后直接跳到插入
+CACHE_DIR = 'cache'
+
+
+def _cache_key(processor: PDFProcessor, embedder: VectorEmbedder) -> str:
+    """缓存键: PDF 修改时间 + 分块参数 + 模型, 任一变化即失效"""
+    raw = '%s|%d|%d|%d|%s|%d' % (
+        os.path.getmtime(PDF_PATH), processor.min_chunk_size,
+        processor.max_chunk_size, processor.overlap,
+        embedder.model_name, embedder.dimension)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _load_cached_chunks(key: str):
+    """命中则返回已带向量的分块列表, 未命中返回 None"""
+    if HAS_PYARROW:
+        path = os.path.join(CACHE_DIR, key + '.parquet')
+        if not os.path.exists(path):
+            return None
+        table = pq.read_table(path)
+        embeddings = np.asarray(
+            table.column('embedding').to_pylist(), dtype=np.float32)
+        return [TextChunk(text=text, page_number=page, source=source,
+                          embedding=embedding)
+                for text, page, source, embedding in zip(
+                    table.column('text').to_pylist(),
+                    table.column('page_number').to_pylist(),
+                    table.column('source').to_pylist(),
+                    embeddings)]
+    path = os.path.join(CACHE_DIR, key + '.pkl')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _store_cached_chunks(key: str, chunks, dimension: int):
+    """落盘缓存; float32 向量按定长列表存, 每块约 1.5KB"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    if HAS_PYARROW:
+        flat = np.concatenate(
+            [np.asarray(c.embedding, dtype=np.float32) for c in chunks])
+        table = pa.table({
+            'text': [c.text for c in chunks],
+            'page_number': [c.page_number for c in chunks],
+            'source': [c.source for c in chunks],
+            'embedding': pa.FixedSizeListArray.from_arrays(
+                pa.array(flat, type=pa.float32()), dimension),
+        })
+        pq.write_table(table, os.path.join(CACHE_DIR, key + '.parquet'))
+        return
+    with open(os.path.join(CACHE_DIR, key + '.pkl'), 'wb') as f:
+        pickle.dump(chunks, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+async def _insert_all(manager: MilvusPDFManager, chunks) -> int:
+    """异步并发写入全部分块"""
+    return await manager.insert_batches_async(
+        chunks, INSERT_BATCH, concurrency=INSERT_CONCURRENCY)
+
+
+def fix_search_issue(smoke: bool = False):
+    """增量修复; smoke=True 时跑批量测试查询验证检索"""
+    embedder = VectorEmbedder()
+    manager = MilvusPDFManager(collection_name=COLLECTION_NAME,
+                               dimension=embedder.dimension)
+
+    # 清理重复数据改为按内容指纹跳过重复块: 脚本幂等,
+    # 不再整库删除重建, 重跑只补增量
+    manager.create_collection()
+    manager.load_collection()
+
+    processor = PDFProcessor(min_chunk_size=100, max_chunk_size=800,
+                             overlap=80)
+    key = _cache_key(processor, embedder)
+    chunks = _load_cached_chunks(key)
+    if chunks is None:
+        chunks = processor.process_pdf(PDF_PATH)
+        embedder.embed_chunks(chunks)
+        _store_cached_chunks(key, chunks, embedder.dimension)
+    else:
+        logger.info("缓存命中: %d 块, 跳过解析与向量化", len(chunks))
+
+    chunks = manager.filter_existing(chunks)
+    if not chunks:
+        logger.info("无增量分块, 集合已是最新")
+        return
+
+    # 分批插入: 单次全量 insert 在块数大时会撞 gRPC 消息上限;
+    # 异步客户端可用时小并发重叠 RPC 往返
+    if HAS_ASYNC_MILVUS:
+        inserted = asyncio.run(_insert_all(manager, chunks))
+    else:
+        inserted = 0
+        for start in range(0, len(chunks), INSERT_BATCH):
+            inserted += manager.insert_chunks(
+                chunks[start:start + INSERT_BATCH])
+    logger.info("入库完成: %d 块", inserted)
+
+    # 插入循环零刷盘, 此处刷一次再加载; 之前的测试查询都在这之后
+    manager.flush()
+    manager.load_collection()
+
+    if not smoke:
+        return
+
+    # 测试查询是可选验证, 不上修复关键路径;
+    # 三条查询一次 encode + 一次多向量 search, 省 N-1 次前向和 RPC
+    test_queries = ['宅送君とは何ですか', '料金について', 'ログイン方法']
+    query_vectors = embedder.embed_texts(test_queries)
+    result_groups = manager.search_similar_batch(query_vectors, top_k=3)
+    # %-style 惰性格式化: 级别被过滤时参数根本不字符串化
+    for query, results in zip(test_queries, result_groups):
+        logger.info("🔍 测试查询: %s", query)
+        for i, result in enumerate(results, 1):
+            logger.info("  📄 结果 %d: %s (%.4f)",
+                        i, result['text'][:50], result['score'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='修复 PDF 搜索')
+    parser.add_argument('--smoke', action='store_true',
+                        help='重建后跑测试查询验证检索')
+    parser.add_argument('--yes', action='store_true',
+                        help='跳过确认, 便于脚本化/并行批跑')
+    args = parser.parse_args()
+
+    print("=== 修复 PDF 搜索 ===")
+    print("将增量更新集合: %s (按内容指纹去重, 不删除既有数据)"
+          % COLLECTION_NAME)
+    if not args.yes and input("继续？(y/N): ").lower() != 'y':
+        print("已取消")
+        return
+    fix_search_issue(smoke=args.smoke)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gunicorn 配置
+
+preload_app 只预载模型权重 (wsgi.py 里的 preload_model, 无线程,
+fork 后 COW 共享); 其余服务统一在 post_fork 里起:
+QueryBatcher 聚合线程/检索线程池/日志 QueueListener 都是后台
+线程, fork 不继承线程, 在 master 里起的话每个 worker 拿到的
+都是死线程 — 检索请求会阻塞到超时, 日志记录堆在队列里永远
+不落盘。
+"""
+
+import os
+
+bind = '0.0.0.0:5001'
+workers = os.cpu_count() or 2
+worker_class = 'gthread'
+threads = 8
+preload_app = True
+
+
+def post_fork(server, worker):
+    """fork 后在每个 worker 里重建线程类服务"""
+    from enhanced_logger import enhanced_logger
+    enhanced_logger.restart()
+    from enhanced_pdf_search_api import initialize_services
+    initialize_services()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 向量化基础组件
+
+fix_* 修复脚本共用的 PDF 解析 / 向量化 / Milvus 管理类。
+enhanced_pdf_search_api 是线上服务路径, 本模块保持脚本友好的轻量实现。
+"""
+
+import json
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from PyPDF2 import PdfReader
+    HAS_PYPDF = True
+except ImportError:
+    HAS_PYPDF = False
+
+try:
+    from sentence_transformers import SentenceTransformer
+    HAS_SENTENCE_TRANSFORMERS = True
+except ImportError:
+    HAS_SENTENCE_TRANSFORMERS = False
+
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
+try:
+    from pymilvus import (Collection, CollectionSchema, DataType,
+                          FieldSchema, utility)
+    HAS_MILVUS = True
+except ImportError:
+    HAS_MILVUS = False
+
+try:
+    from pymilvus import AsyncMilvusClient
+    HAS_ASYNC_MILVUS = True
+except ImportError:
+    HAS_ASYNC_MILVUS = False
+
+from _milvus import ensure_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TextChunk:
+    """单个文本分块"""
+    text: str
+    page_number: int = 0
+    source: str = ''
+    embedding: Optional[list] = None
+    text_sha: str = ''
+
+
+def text_sha1(text: str) -> str:
+    """分块正文的内容指纹 (入库去重用)"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class PDFProcessor:
+    """PDF 解析与分块"""
+
+    def __init__(self, min_chunk_size: int = 100,
+                 max_chunk_size: int = 800, overlap: int = 80):
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.overlap = overlap
+
+    def process_pdf(self, pdf_path: str) -> List[TextChunk]:
+        """逐页抽取文本并按长度滑窗分块"""
+        if not HAS_PYPDF:
+            raise RuntimeError('PyPDF2 未安装, 无法解析 PDF')
+        chunks: List[TextChunk] = []
+        reader = PdfReader(pdf_path)
+        step = self.max_chunk_size - self.overlap
+        for page_no, page in enumerate(reader.pages, 1):
+            text = page.extract_text() or ''
+            for start in range(0, len(text), step):
+                piece = text[start:start + self.max_chunk_size].strip()
+                if len(piece) >= self.min_chunk_size:
+                    chunks.append(TextChunk(text=piece, page_number=page_no,
+                                            source=pdf_path))
+        logger.info("PDF 解析完成: %s, %d 块", pdf_path, len(chunks))
+        return chunks
+
+
+class VectorEmbedder:
+    """SentenceTransformer 向量化封装"""
+
+    DEFAULT_MODEL = ('sentence-transformers/'
+                     'paraphrase-multilingual-MiniLM-L12-v2')
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        self.model_name = model_name
+        self.dimension = 384
+        self._use_cuda = HAS_TORCH and torch.cuda.is_available()
+        # GPU 上半精度 + 大批: fp16 前向吞吐约翻倍, 大批把
+        # kernel 启动开销摊薄; CPU 保持 fp32 小批
+        self.batch_size = 256 if self._use_cuda else 32
+        if HAS_SENTENCE_TRANSFORMERS:
+            self.model = SentenceTransformer(model_name)
+            if self._use_cuda:
+                self.model = self.model.half().to('cuda')
+        else:
+            self.model = None
+        # 最近一次 embed_chunks 的连续 (N, dim) float32 矩阵
+        self.embedding_matrix: Optional[np.ndarray] = None
+
+    def embed_chunks(self, chunks: List[TextChunk]) -> List[TextChunk]:
+        """为分块批量生成向量
+
+        全部文本一次进 encode: 模型按 batch_size 走批量矩阵乘,
+        而不是逐块一次前向 (逐块调用每次都重入 Python 并发起
+        单样本 kernel, 吞吐差一个数量级)。
+        """
+        if not chunks:
+            return chunks
+        texts = [chunk.text for chunk in chunks]
+        if HAS_TORCH:
+            with torch.inference_mode():
+                vectors = self.model.encode(
+                    texts, batch_size=self.batch_size,
+                    show_progress_bar=False, convert_to_numpy=True,
+                    normalize_embeddings=True)
+        else:
+            vectors = self.model.encode(
+                texts, batch_size=self.batch_size, show_progress_bar=False,
+                convert_to_numpy=True, normalize_embeddings=True)
+        # 整体保留连续矩阵, chunk.embedding 只是行视图,
+        # 后续入库不再把 N×dim 个标量拆进 Python 列表
+        self.embedding_matrix = np.ascontiguousarray(
+            vectors, dtype=np.float32)
+        for chunk, vector in zip(chunks, self.embedding_matrix):
+            chunk.embedding = vector
+            # 顺手算内容指纹, 入库前去重用
+            chunk.text_sha = text_sha1(chunk.text)
+        return chunks
+
+    def embed_text(self, text: str) -> list:
+        return self.model.encode(text).tolist()
+
+    def embed_texts(self, texts: List[str]):
+        """多条查询一次前向"""
+        return self.model.encode(texts, convert_to_numpy=True,
+                                 normalize_embeddings=True)
+
+
+class MilvusPDFManager:
+    """PDF 分块集合的 Milvus 管理器"""
+
+    def __init__(self, host: str = 'localhost', port: str = '19530',
+                 collection_name: str = 'pdf_chunks', dimension: int = 384,
+                 vector_dtype: str = 'fp16'):
+        self.collection_name = collection_name
+        self.dimension = dimension
+        self.uri = 'http://%s:%s' % (host, port)
+        # fp16 向量字段: 存储/gRPC 载荷减半, dim=384 下召回损失
+        # 可忽略; 老版本 pymilvus 无 FLOAT16_VECTOR 时退回 fp32
+        if vector_dtype == 'fp16' and HAS_MILVUS \
+                and hasattr(DataType, 'FLOAT16_VECTOR'):
+            self.vector_dtype = 'fp16'
+            self._np_dtype = np.float16
+        else:
+            self.vector_dtype = 'fp32'
+            self._np_dtype = np.float32
+        self.collection: Optional['Collection'] = None
+        if HAS_MILVUS:
+            # 进程级单例连接: 多个管理器/脚本串联时不重复握手
+            ensure_connection(host=host, port=port)
+
+    def _cast(self, vector):
+        """把向量统一成字段 dtype, 半精度时载荷直接减半"""
+        return np.asarray(vector, dtype=self._np_dtype)
+
+    def create_collection(self):
+        """建集合 (已存在则直接复用)"""
+        if not HAS_MILVUS:
+            return
+        if utility.has_collection(self.collection_name):
+            self.collection = Collection(self.collection_name)
+            return
+        fields = [
+            FieldSchema(name='id', dtype=DataType.INT64,
+                        is_primary=True, auto_id=True),
+            FieldSchema(name='text', dtype=DataType.VARCHAR,
+                        max_length=2000),
+            FieldSchema(name='page_number', dtype=DataType.INT64),
+            FieldSchema(name='source', dtype=DataType.VARCHAR,
+                        max_length=500),
+            FieldSchema(name='text_sha', dtype=DataType.VARCHAR,
+                        max_length=40),
+            FieldSchema(name='embedding',
+                        dtype=(DataType.FLOAT16_VECTOR
+                               if self.vector_dtype == 'fp16'
+                               else DataType.FLOAT_VECTOR),
+                        dim=self.dimension),
+        ]
+        schema = CollectionSchema(fields, description='PDF 文本分块')
+        self.collection = Collection(self.collection_name, schema)
+        logger.info("集合已创建: %s", self.collection_name)
+
+    def insert_chunks(self, chunks: List[TextChunk],
+                      flush: bool = False) -> int:
+        """插入一批分块
+
+        Flush 是全局同步操作, 会把所有写入方串行化;
+        默认不刷盘, 由调用方在全部批次插完后调用一次 flush()。
+        循环期间新插入的行遵循 Milvus 的最终一致性, 对
+        重建类脚本无影响 (检索发生在收尾 flush+load 之后)。
+        """
+        if not HAS_MILVUS or not chunks:
+            return 0
+        # 向量列作为单个 (N, dim) ndarray 传入, pymilvus 直接走
+        # numpy -> C 的转换, 省掉逐行装箱成 Python float 列表
+        embeddings = np.asarray([c.embedding for c in chunks],
+                                dtype=self._np_dtype)
+        entities = [
+            [c.text for c in chunks],
+            [c.page_number for c in chunks],
+            [c.source for c in chunks],
+            [c.text_sha for c in chunks],
+            embeddings,
+        ]
+        self.collection.insert(entities)
+        if flush:
+            self.collection.flush()
+        return len(chunks)
+
+    def flush(self):
+        """收尾刷盘: 全部批次插完后调用一次"""
+        if HAS_MILVUS and self.collection is not None:
+            self.collection.flush()
+
+    def _rows(self, chunks: List[TextChunk]) -> List[Dict[str, Any]]:
+        return [{'text': c.text, 'page_number': c.page_number,
+                 'source': c.source, 'text_sha': c.text_sha,
+                 'embedding': self._cast(c.embedding)}
+                for c in chunks]
+
+    async def insert_batches_async(self, chunks: List[TextChunk],
+                                   batch_size: int,
+                                   concurrency: int = 4) -> int:
+        """AsyncMilvusClient 并发分批插入
+
+        同步客户端每批都在等 gRPC 往返; 用小并发 (2-4) 重叠
+        在途请求就能吃满写入带宽, 再大反而挤兑服务端。
+        """
+        if not chunks:
+            return 0
+        client = AsyncMilvusClient(uri=self.uri)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _insert(batch):
+            async with semaphore:
+                await client.insert(self.collection_name, self._rows(batch))
+
+        batches = [chunks[start:start + batch_size]
+                   for start in range(0, len(chunks), batch_size)]
+        try:
+            await asyncio.gather(*[_insert(batch) for batch in batches])
+        finally:
+            await client.close()
+        return len(chunks)
+
+    def filter_existing(self, chunks: List[TextChunk],
+                        batch_size: int = 1000) -> List[TextChunk]:
+        """按 text_sha 过滤已入库的分块, 返回未入库的增量
+
+        分批 query 标量字段远比整库重建便宜: 重跑时重复块
+        既不重插也不重付向量化 (配合分块缓存)。
+        """
+        if not HAS_MILVUS or self.collection is None:
+            return chunks
+        fresh: List[TextChunk] = []
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            for chunk in batch:
+                if not chunk.text_sha:
+                    chunk.text_sha = text_sha1(chunk.text)
+            expr = 'text_sha in %s' % json.dumps(
+                [c.text_sha for c in batch])
+            existing = {row['text_sha'] for row in self.collection.query(
+                expr=expr, output_fields=['text_sha'])}
+            fresh.extend(c for c in batch if c.text_sha not in existing)
+        return fresh
+
+    def load_collection(self):
+        """确保索引存在并加载到内存"""
+        if not HAS_MILVUS or self.collection is None:
+            return
+        if not self.collection.indexes:
+            self.collection.create_index(
+                field_name='embedding',
+                index_params={'index_type': 'IVF_FLAT',
+                              'metric_type': 'COSINE',
+                              'params': {'nlist': 128}})
+        self.collection.load()
+
+    def search_similar(self, query_text: str, embedder: VectorEmbedder,
+                       top_k: int = 5) -> List[Dict[str, Any]]:
+        """按查询文本做相似检索"""
+        if not HAS_MILVUS or self.collection is None:
+            return []
+        vector = self._cast(embedder.embed_text(query_text))
+        hits = self.collection.search(
+            data=[vector], anns_field='embedding',
+            param={'metric_type': 'COSINE', 'params': {'nprobe': 16}},
+            limit=top_k, output_fields=['text', 'page_number', 'source'])
+        results = []
+        for hit in hits[0]:
+            results.append({
+                'text': hit.entity.get('text'),
+                'page_number': hit.entity.get('page_number'),
+                'source': hit.entity.get('source'),
+                'score': hit.score,
+            })
+        return results
+
+    def search_similar_batch(self, query_vectors,
+                             top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """多向量一次检索: N 条查询一次 RPC, 按输入顺序返回 N 组"""
+        if not HAS_MILVUS or self.collection is None:
+            return [[] for _ in range(len(query_vectors))]
+        hit_groups = self.collection.search(
+            data=[self._cast(v) for v in query_vectors],
+            anns_field='embedding',
+            param={'metric_type': 'COSINE', 'params': {'nprobe': 16}},
+            limit=top_k, output_fields=['text', 'page_number', 'source'])
+        return [[{
+            'text': hit.entity.get('text'),
+            'page_number': hit.entity.get('page_number'),
+            'source': hit.entity.get('source'),
+            'score': hit.score,
+        } for hit in hits] for hits in hit_groups]
+
+    def drop_collection(self):
+        """整库删除 (重建前清理)"""
+        if HAS_MILVUS and utility.has_collection(self.collection_name):
+            utility.drop_collection(self.collection_name)
+            logger.info("集合已删除: %s", self.collection_name)
+        self.collection = None
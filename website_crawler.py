@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基础网站爬虫
+
+fix_and_crawl / fix_encoding_crawl 共用的简单 BFS 爬虫:
+抓取 -> 分块 -> 统一 save_to_milvus 入库。
+enhanced_website_crawler 是流水线化的升级路径, 本模块保持脚本直观。
+"""
+
+import re
+import json
+import time
+import queue
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from pdf_vector_system import (HAS_ASYNC_MILVUS, MilvusPDFManager,
+                               TextChunk, VectorEmbedder)
+
+logger = logging.getLogger(__name__)
+
+# 无响应头声明时信页面自带的 <meta charset>, 只扫前 4KB
+_META_CHARSET_RE = re.compile(br'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+
+
+@dataclass
+class CrawlConfig:
+    """爬虫配置"""
+    base_url: str
+    max_pages: int = 50
+    max_depth: int = 2
+    timeout: int = 10
+    delay_between_requests: float = 1.0
+    concurrent_workers: int = 3
+    min_chunk_size: int = 100
+    max_chunk_size: int = 800
+    # 入库批大小: 每批一次 insert RPC, 过大易触发 gRPC 消息上限
+    insert_batch_size: int = 2048
+    headers: Dict[str, str] = field(default_factory=lambda: {
+        'User-Agent': 'Mozilla/5.0 (compatible; FixCrawler/1.0)',
+    })
+
+
+class WebsiteCrawler:
+    """站内 BFS 爬虫 (同步)"""
+
+    def __init__(self, config: CrawlConfig,
+                 embedder: VectorEmbedder = None,
+                 manager: MilvusPDFManager = None):
+        self.config = config
+        self.embedder = embedder
+        self.manager = manager
+        self.base_domain = urlparse(config.base_url).netloc
+        # 复用连接池: 裸 requests.get 每页都重付 TCP+TLS 握手,
+        # keep-alive 之后同主机请求只剩请求本身的往返
+        self.session = requests.Session()
+        self.session.headers.update(config.headers)
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=max(8, config.concurrent_workers * 2))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.visited: set = set()
+        self.failed: set = set()
+        self.all_chunks: List[TextChunk] = []
+        self.chunk_count = 0
+        self.saved_count = 0
+        self.ingest_errors = 0
+        # 流水线模式下的 生产者(抓取)->消费者(向量化+入库) 队列
+        self.chunk_queue: Optional[queue.Queue] = None
+
+    @staticmethod
+    def _is_html(headers) -> bool:
+        return headers.get('Content-Type', '') \
+            .lower().startswith('text/html')
+
+    def _fetch(self, url: str):
+        """抓取单页; 非 HTML 按响应头提前放弃, 不读 body"""
+        response = self.session.get(url, timeout=self.config.timeout,
+                                    stream=True)
+        response.raise_for_status()
+        if not self._is_html(response.headers):
+            response.close()
+            return None
+        # 触发读取并缓存 body, 之后 response.content 直接可用
+        response.content  # noqa: B018
+        return response
+
+    def _parse(self, content: bytes,
+               declared: str = None) -> BeautifulSoup:
+        """先自行解码成 str 再交给解析器, 跳过 UnicodeDammit 探测
+
+        编码来源按优先级: 响应头声明 (requests 对无声明页面给的
+        ISO-8859-1 视为未声明) -> 页面 <meta charset> -> 按
+        utf-8/shift_jis/euc-jp 逐个试解。bytes.decode 的失败是
+        可捕获的, 不像 from_encoding 那样把错误编码硬塞给
+        UnicodeDammit 产出乱码。
+        """
+        if declared in (None, 'ISO-8859-1', 'ascii'):
+            declared = None
+            meta = _META_CHARSET_RE.search(content[:4096])
+            if meta:
+                declared = meta.group(1).decode('ascii', 'ignore')
+        candidates = [declared] if declared else []
+        candidates.extend(e for e in ('utf-8', 'shift_jis', 'euc-jp')
+                          if e != declared)
+        for encoding in candidates:
+            try:
+                return BeautifulSoup(content.decode(encoding), 'lxml')
+            except (UnicodeDecodeError, LookupError):
+                continue
+        # 全部失败时才交给解析器自己探测
+        return BeautifulSoup(content, 'lxml')
+
+    def _chunk_text(self, text: str, url: str) -> List[TextChunk]:
+        """正文按长度切块"""
+        chunks = []
+        size = self.config.max_chunk_size
+        for start in range(0, len(text), size):
+            piece = text[start:start + size].strip()
+            if len(piece) >= self.config.min_chunk_size:
+                chunks.append(TextChunk(text=piece, source=url))
+        return chunks
+
+    def _extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
+        links = []
+        for anchor in soup.find_all('a', href=True):
+            url = urljoin(base_url, anchor['href']).split('#')[0]
+            parsed = urlparse(url)
+            if parsed.scheme in ('http', 'https') \
+                    and parsed.netloc == self.base_domain:
+                links.append(url)
+        return links
+
+    def _handle_page(self, url: str, soup: BeautifulSoup) -> List[str]:
+        """分块暂存/交给消费者, 返回页面上的站内链接"""
+        text = soup.get_text(separator='\n', strip=True)
+        page_chunks = self._chunk_text(text, url)
+        self.chunk_count += len(page_chunks)
+        if self.chunk_queue is not None:
+            # 流水线模式: 分块即时交给消费者, 不在内存里攒全量
+            for chunk in page_chunks:
+                self.chunk_queue.put(chunk)
+        else:
+            self.all_chunks.extend(page_chunks)
+        return self._extract_links(soup, url)
+
+    def crawl(self) -> Dict:
+        """抓取入口: aiohttp 可用时按并发度批量抓取, 否则同步回退"""
+        if HAS_AIOHTTP:
+            asyncio.run(self._crawl_async())
+        else:
+            self._crawl_sync()
+        logger.info("抓取完成: %d 页, %d 块, 失败 %d",
+                    len(self.visited), self.chunk_count,
+                    len(self.failed))
+        return {'pages': len(self.visited), 'chunks': self.chunk_count,
+                'failed': len(self.failed)}
+
+    def _crawl_sync(self):
+        """同步回退: 逐页串行 BFS"""
+        pending = [(self.config.base_url, 0)]
+        while pending and len(self.visited) < self.config.max_pages:
+            url, depth = pending.pop(0)
+            if url in self.visited or depth > self.config.max_depth:
+                continue
+            self.visited.add(url)
+            try:
+                response = self._fetch(url)
+            except Exception as exc:  # noqa: BLE001
+                self.failed.add(url)
+                logger.warning("抓取失败: %s (%s)", url, exc)
+                continue
+            if response is None:
+                continue  # 非 HTML 资源 (PDF/图片/JS), 不进解析器
+            soup = self._parse(response.content, response.encoding)
+            pending.extend((link, depth + 1)
+                           for link in self._handle_page(url, soup))
+            time.sleep(self.config.delay_between_requests)
+
+    async def _fetch_one(self, session, semaphore, url: str):
+        """信号量限流下抓取单页, 返回 (url, 正文字节, 声明编码)"""
+        async with semaphore:
+            try:
+                timeout = aiohttp.ClientTimeout(total=self.config.timeout)
+                async with session.get(url, timeout=timeout) as response:
+                    response.raise_for_status()
+                    if not self._is_html(response.headers):
+                        # 非 HTML 资源只付头部, body 不读
+                        return url, None, None
+                    content = await response.read()
+                    charset = response.charset
+                await asyncio.sleep(self.config.delay_between_requests)
+                return url, content, charset
+            except Exception as exc:  # noqa: BLE001
+                self.failed.add(url)
+                logger.warning("抓取失败: %s (%s)", url, exc)
+                return url, None, None
+
+    async def _crawl_async(self):
+        """异步 BFS: 每层 URL 一次 gather, 并发度由信号量限定
+
+        同步路径每页都在等网络往返; 批量 gather 后同层页面的
+        延迟互相重叠, 加速接近并发度 (受站点礼貌延迟约束)。
+        """
+        semaphore = asyncio.Semaphore(self.config.concurrent_workers)
+        frontier = [self.config.base_url]
+        depth = 0
+        async with aiohttp.ClientSession(
+                headers=self.config.headers) as session:
+            while frontier and depth <= self.config.max_depth \
+                    and len(self.visited) < self.config.max_pages:
+                batch = []
+                for url in frontier:
+                    if url not in self.visited:
+                        self.visited.add(url)
+                        batch.append(url)
+                    if len(self.visited) >= self.config.max_pages:
+                        break
+                if not batch:
+                    break
+                results = await asyncio.gather(
+                    *[self._fetch_one(session, semaphore, url)
+                      for url in batch])
+                next_frontier: List[str] = []
+                for url, content, charset in results:
+                    if content is None:
+                        continue
+                    soup = self._parse(content, charset)
+                    next_frontier.extend(self._handle_page(url, soup))
+                frontier = next_frontier
+                depth += 1
+
+    # 哨兵对象: 通知消费者线程收工
+    _SENTINEL = object()
+
+    def _ingest_batch(self, batch: List[TextChunk]):
+        """向量化并插入一批; 失败只丢这一批, 不杀消费者线程
+
+        消费者一死, 生产者会堵死在有界队列的 put 上,
+        crawl_with_ingest 的 finally 也等不到 join —
+        整个脚本挂住而不是报错退出。
+        """
+        try:
+            self.embedder.embed_chunks(batch)
+            self.saved_count += self.manager.insert_chunks(batch)
+        except Exception as exc:  # noqa: BLE001
+            self.ingest_errors += 1
+            logger.error("入库批次失败, 丢弃 %d 块: %s", len(batch), exc)
+
+    def _ingest_worker(self):
+        """消费者线程: 从队列攒满一批就向量化并插入 (不刷盘)"""
+        batch: List[TextChunk] = []
+        batch_size = self.config.insert_batch_size
+        while True:
+            chunk = self.chunk_queue.get()
+            if chunk is self._SENTINEL:
+                break
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                self._ingest_batch(batch)
+                batch = []
+        if batch:
+            self._ingest_batch(batch)
+
+    def crawl_with_ingest(self) -> Dict:
+        """边抓边入库的流水线模式
+
+        抓取和 向量化+插入 是两段各自很长的 I/O, 串行跑要付两段
+        之和; 用队列把它们重叠后墙钟时间约等于较长的一段。
+        """
+        if self.manager is None or self.embedder is None:
+            return self.crawl()
+        self.chunk_queue = queue.Queue(maxsize=self.config.insert_batch_size * 4)
+        consumer = threading.Thread(target=self._ingest_worker,
+                                    name='milvus-ingest', daemon=True)
+        consumer.start()
+        try:
+            stats = self.crawl()
+        finally:
+            self.chunk_queue.put(self._SENTINEL)
+            consumer.join()
+            self.chunk_queue = None
+        self.manager.flush()
+        stats['chunks_saved'] = self.saved_count
+        stats['ingest_errors'] = self.ingest_errors
+        if self.ingest_errors:
+            logger.warning("流水线入库完成: %d 块, 失败批次 %d",
+                           self.saved_count, self.ingest_errors)
+        else:
+            logger.info("流水线入库完成: %d 块", self.saved_count)
+        return stats
+
+    def save_to_milvus(self) -> int:
+        """向量化并按固定批大小分批入库
+
+        单次 insert 全量行在大抓取时会撞 gRPC 消息上限
+        (RESOURCE_EXHAUSTED), 切成小批后每个 RPC 可控,
+        吞吐随块数线性, 也没有一次性物化的大消息内存尖峰。
+        """
+        if self.manager is None or self.embedder is None:
+            return 0
+        self.embedder.embed_chunks(self.all_chunks)
+        batch_size = self.config.insert_batch_size
+        total = 0
+        for start in range(0, len(self.all_chunks), batch_size):
+            total += self.manager.insert_chunks(
+                self.all_chunks[start:start + batch_size])
+        # 循环内零刷盘, 插完统一刷一次
+        self.manager.flush()
+        logger.info("入库完成: %d 块 (批大小 %d)", total, batch_size)
+        return total
+
+    def save_to_milvus_async(self) -> int:
+        """向量化后用异步客户端并发分批入库
+
+        异步客户端不可用时退回同步分批路径。
+        """
+        if self.manager is None or self.embedder is None:
+            return 0
+        if not HAS_ASYNC_MILVUS:
+            return self.save_to_milvus()
+        self.embedder.embed_chunks(self.all_chunks)
+        total = asyncio.run(self.manager.insert_batches_async(
+            self.all_chunks, self.config.insert_batch_size))
+        self.manager.flush()
+        logger.info("入库完成: %d 块 (异步并发)", total)
+        return total
+
+    def save_report(self, path: str = 'fix_crawl_report.json'):
+        """输出抓取报告"""
+        report = {
+            'base_url': self.config.base_url,
+            'pages_crawled': len(self.visited),
+            'pages_failed': len(self.failed),
+            'chunks': self.chunk_count,
+            'failed_urls': sorted(self.failed),
+        }
+        if HAS_ORJSON:
+            # orjson 编码比 json 快约 5x, 大报告时差距明显
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info("报告已保存: %s", path)
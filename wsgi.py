@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+gunicorn 入口: gunicorn -c gunicorn.conf.py wsgi:app
+
+--preload 下本模块在 master 里 import, 这里只做 fork 安全的
+模型加载 (权重 COW 共享); QueryBatcher/线程池/日志 listener
+这些带后台线程的服务在 gunicorn.conf.py 的 post_fork 里
+每个 worker 起一份 — fork 不继承线程, 在 master 起的线程
+到了子进程就是死的, 请求会一直等不到结果。
+"""
+
+from enhanced_pdf_search_api import app, preload_model
+
+preload_model()